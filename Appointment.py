@@ -1,8 +1,27 @@
 # Appointment.py
 
+import hashlib
+
 from DateNew import DateNew
 
+
+def appointment_key(oms_policy: int, diagnosis: str, doctor: str, appointment_date: DateNew) -> int:
+    """Составной ключ (oms, диагноз, врач, дата) как неотрицательное int для ХТ.
+
+    Старшие разряды - однозначная запись всех полей (строки с длиной, поэтому разные
+    приёмы не совпадут никогда), младшие 64 бита - blake2b от неё, чтобы хеш-стратегии,
+    смотрящие на младшие биты, получали хорошо перемешанное значение.
+    """
+    payload = (f"{oms_policy};{len(diagnosis)};{diagnosis};{len(doctor)};{doctor};"
+               f"{appointment_date.day}.{appointment_date.month}.{appointment_date.year}").encode('utf-8')
+    digest = hashlib.blake2b(payload, digest_size=8).digest()
+    return int.from_bytes(payload + digest, 'big')
+
+
 class Appointment:
+    # Записей много - храним поля в __slots__ без словаря на каждый экземпляр
+    __slots__ = ("oms_policy", "diagnosis", "doctor", "appointment_date")
+
     def __init__(self, oms_policy: int, diagnosis: str, doctor: str, appointment_date: DateNew):
         self.validate_oms_policy(oms_policy)
         self.validate_diagnosis(diagnosis)
@@ -40,6 +59,10 @@ class Appointment:
         if doctor is None or doctor.strip() == "":
             raise ValueError("The doctor's name cannot be empty")
 
+    def key(self) -> int:
+        """Составной ключ приёма для ХТ точного совпадения (см. appointment_key)."""
+        return appointment_key(self.oms_policy, self.diagnosis, self.doctor, self.appointment_date)
+
     # Методы сравнения, если понадобятся
     def __eq__(self, other):
         if not isinstance(other, Appointment):
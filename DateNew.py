@@ -18,6 +18,9 @@ MONTHS_NAMES = {
 }
 
 class DateNew:
+    # Дата есть у каждой записи - храним поля в __slots__ без словаря на экземпляр
+    __slots__ = ("day", "month", "year", "_ordinal")
+
     # Используем ctypes для массива дней в месяце (индекс 0 не используется)
     DAYS_IN_MONTH = (ctypes.c_int * 13)(0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
 
@@ -46,6 +49,8 @@ class DateNew:
         self.day = day
         self.month = month
         self.year = year
+        # Порядковый номер для сравнения одной операцией (год, месяц, день по старшинству)
+        self._ordinal = (year * 16 + month) * 32 + day
 
     def __repr__(self) -> str:
         # Формат dd mmm yyyy
@@ -55,21 +60,17 @@ class DateNew:
     def __eq__(self, other: "DateNew") -> bool:
         if not isinstance(other, DateNew):
             return NotImplemented
-        return (
-            self.day == other.day
-            and self.month == other.month
-            and self.year == other.year
-        )
+        return self._ordinal == other._ordinal
 
     def __lt__(self, other: "DateNew") -> bool:
         if not isinstance(other, DateNew):
             return NotImplemented
+        # _ordinal упорядочен как (год, месяц, день)
+        return self._ordinal < other._ordinal
 
-        if self.year != other.year:
-            return self.year < other.year
-        if self.month != other.month:
-            return self.month < other.month
-        return self.day < other.day
+    def compare(self, other: "DateNew") -> int:
+        """Трёхстороннее сравнение: -1, 0 или 1 (используется AVL-деревом)."""
+        return (self._ordinal > other._ordinal) - (self._ordinal < other._ordinal)
 
     @staticmethod
     def _check_valid_year(s: str) -> None:
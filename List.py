@@ -1,8 +1,17 @@
-from typing import Optional, Iterator, Generic, TypeVar
+import heapq
+from itertools import islice
+from typing import Optional, Iterator, Iterable, Generic, TypeVar, Callable
 
 T = TypeVar('T')
 
 class Node(Generic[T]):
+    """Узел односвязного списка (data, next) - публичный тип прежнего кольцевого MyList.
+
+    MyList хранит элементы в блоках Chunk, а не в узлах; Node остаётся для кода,
+    который строит собственные цепочки узлов.
+    """
+    __slots__ = ("data", "next")
+
     def __init__(self, data: T) -> None:
 
         self.data = data
@@ -11,171 +20,235 @@ class Node(Generic[T]):
     def __repr__(self) -> str:
         return f"Node({self.data!r})"
 
-class MyList(Generic[T]):
-    def __init__(self) -> None:
+class Chunk(Generic[T]):
+    """Блок развёрнутого списка: до MyList.CHUNK_SIZE элементов подряд в обычном list.
 
-        self.head: Optional[Node[T]] = None
-        self._size: int = 0
+    Элементы блока лежат в порядке добавления, а MyList обходит блок с конца, поэтому
+    новый элемент - в конце блока-головы, без сдвигов.
+    """
+    __slots__ = ("items", "next")
 
-    def __len__(self) -> int:
-        return self._size
+    def __init__(self) -> None:
+        self.items: list = []
+        # Следующий блок - с более ранними элементами
+        self.next: Optional[Chunk[T]] = None
 
+    def __repr__(self) -> str:
+        return f"Chunk({self.items!r})"
+
+class MyList(Generic[T]):
+    """Список, в котором append кладёт элемент в начало: обход - от последнего добавленного
+    к первому (как у прежнего кольцевого списка).
 
+    Развёрнутый список: цепочка блоков Chunk от головы (новые элементы) к хвосту (старые).
+    append и extend - O(1) на элемент (дописывают блок-голову), индексация и pop - O(n / CHUNK_SIZE)
+    переходов по блокам вместо O(n) по узлам.
+    """
+    # Число элементов в блоке
+    CHUNK_SIZE: int = 64
 
-    def append(self, item: T) -> int:
+    def __init__(self) -> None:
 
-        new_node = Node(item)
+        self.head: Optional[Chunk[T]] = None
+        self._size: int = 0
 
-        if self.head is None:
+    @classmethod
+    def from_iterable(cls, items: Iterable[T]) -> "MyList[T]":
+        # То же, что append каждого элемента по порядку: первый окажется в конце обхода
+        result = cls()
+        result.extend(items)
+        return result
 
-            self.head = new_node
-            new_node.next = new_node 
-        else:
+    @classmethod
+    def from_ordered(cls, items: Iterable[T]) -> "MyList[T]":
+        # Обход результата идёт в порядке items: блоки заполняются от головы к хвосту,
+        # без промежуточного list всех элементов
+        result = cls()
+        items = iter(items)
+        tail = None
+        while True:
+            block = list(islice(items, cls.CHUNK_SIZE))
+            if not block:
+                return result
+            # Блок обходится с конца
+            block.reverse()
+            chunk = Chunk()
+            chunk.items = block
+            if tail is None:
+                result.head = chunk
+            else:
+                tail.next = chunk
+            tail = chunk
+            result._size += len(block)
 
-            tail = self.head
-            while tail.next is not self.head:
-                tail = tail.next
+    def __len__(self) -> int:
+        return self._size
 
-            new_node.next = self.head
-            tail.next = new_node  
-            self.head = new_node 
+    def _new_head(self) -> Chunk[T]:
+        chunk = Chunk()
+        chunk.next = self.head
+        self.head = chunk
+        return chunk
 
+    def append(self, item: T) -> int:
+        head = self.head
+        if head is None or len(head.items) >= self.CHUNK_SIZE:
+            head = self._new_head()
+        head.items.append(item)
         self._size += 1
 
         return 0
 
- 
-
-
-    def remove(self, item: T) -> T:
-
-        if self.head is None:
-            raise ValueError(f"{item!r} not in list")
-
-
-        if self.head.data == item:
-            removed_data = self.head.data
-            if self._size == 1:
-                self.head = None
+    def extend(self, items: Iterable[T]) -> None:
+        # Пакетный append: блоки дописываются срезами
+        if not isinstance(items, list):
+            items = list(items)
+        start = 0
+        while start < len(items):
+            head = self.head
+            if head is None or len(head.items) >= self.CHUNK_SIZE:
+                head = self._new_head()
+            end = start + self.CHUNK_SIZE - len(head.items)
+            head.items.extend(items[start:end])
+            start = end
+        self._size += len(items)
+
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if index < 0 or index >= self._size:
+            raise IndexError("Index out of range")
+        return index
+
+    def _locate(self, index: int) -> tuple:
+        # (предыдущий блок, блок, позиция в его items) для индекса в порядке обхода
+        prev = None
+        chunk = self.head
+        while index >= len(chunk.items):
+            index -= len(chunk.items)
+            prev = chunk
+            chunk = chunk.next
+        return prev, chunk, len(chunk.items) - 1 - index
+
+    def _take(self, prev: Optional[Chunk[T]], chunk: Chunk[T], pos: int) -> T:
+        # Вынимает элемент; опустевший блок выпадает из цепочки
+        data = chunk.items.pop(pos)
+        if not chunk.items:
+            if prev is None:
+                self.head = chunk.next
             else:
+                prev.next = chunk.next
+        self._size -= 1
+        return data
 
-                tail = self.head
-                while tail.next is not self.head:
-                    tail = tail.next
-
-                self.head = self.head.next
-                tail.next = self.head
-            self._size -= 1
-            return removed_data
-
-
-        prev = self.head
-        current = self.head.next
-        while current is not self.head:
-            if current.data == item:
-                prev.next = current.next
-                self._size -= 1
-                return current.data
-            prev = current
-            current = current.next
+    def remove(self, item: T) -> T:
+        # Удаляет первое вхождение в порядке обхода
+        prev = None
+        chunk = self.head
+        while chunk is not None:
+            items = chunk.items
+            for pos in range(len(items) - 1, -1, -1):
+                if items[pos] == item:
+                    return self._take(prev, chunk, pos)
+            prev = chunk
+            chunk = chunk.next
 
         raise ValueError(f"{item!r} not in list")
 
     def pop(self, index: int = -1) -> T:
         if self._size == 0:
             raise IndexError("pop from empty list")
-        if index < 0:
-            index += self._size
-        if index < 0 or index >= self._size:
-            raise IndexError("Index out of range")
-
-        if index == 0:
-            return self.remove(self.head.data)
-
-
-        prev = self.head
-        current = self.head.next
-        current_index = 1
-        while current is not self.head and current_index != index:
-            prev = current
-            current = current.next
-            current_index += 1
-
-        if current is self.head and current_index != index:
-             raise IndexError("Index out of range")
-
-        prev.next = current.next
-        self._size -= 1
-        return current.data
+        prev, chunk, pos = self._locate(self._normalize(index))
+        return self._take(prev, chunk, pos)
 
     def __getitem__(self, index: int) -> T:
         if self._size == 0:
             raise IndexError("list is empty")
-        if index < 0:
-            index += self._size
-        if index < 0 or index >= self._size:
-            raise IndexError("Index out of range")
-
-        current = self.head
-        for _ in range(index):
-            current = current.next
-        return current.data
+        _, chunk, pos = self._locate(self._normalize(index))
+        return chunk.items[pos]
 
     def __setitem__(self, index: int, value: T) -> None:
         if self._size == 0:
             raise IndexError("list is empty")
-        if index < 0:
-            index += self._size
-        if index < 0 or index >= self._size:
-            raise IndexError("Index out of range")
-
-        current = self.head
-        for _ in range(index):
-            current = current.next
-        current.data = value
-
+        _, chunk, pos = self._locate(self._normalize(index))
+        chunk.items[pos] = value
+
+
+    def sort(self, key: Optional[Callable] = None, reverse: bool = False) -> None:
+        """Устойчивая сортировка на месте за O(n log n): после неё обход идёт по возрастанию
+        key (по убыванию при reverse), равные элементы сохраняют взаимный порядок.
+
+        Элементы лежат в блоках, а не в отдельных узлах, поэтому перевешивать нечего:
+        они собираются в один list, сортируются (Timsort) и записываются обратно в те же
+        блоки - цепочка блоков и их размеры не меняются.
+        """
+        items = list(self)
+        items.sort(key=key, reverse=reverse)
+        start = 0
+        chunk = self.head
+        while chunk is not None:
+            end = start + len(chunk.items)
+            # Блок обходится с конца
+            chunk.items[:] = items[start:end][::-1]
+            start = end
+            chunk = chunk.next
 
     def __contains__(self, item: T) -> bool:
-        if self.head is None:
-            return False
-        current = self.head
-        for _ in range(self._size):
-            if current.data == item:
+        chunk = self.head
+        while chunk is not None:
+            if item in chunk.items:
                 return True
-            current = current.next
+            chunk = chunk.next
         return False
 
     def __iter__(self) -> Iterator[T]:
-        if self.head is None:
-            return
-        current = self.head
-        for _ in range(self._size): 
-            yield current.data
-            current = current.next
+        chunk = self.head
+        while chunk is not None:
+            yield from reversed(chunk.items)
+            chunk = chunk.next
 
     def __repr__(self) -> str:
-        if self.head is None:
-            return "MyList([])"
-        result = "MyList(["
-        current = self.head
-        for _ in range(self._size):
-            result += repr(current.data)
-            current = current.next
-            if current is not self.head:
-                result += ", "
-        result += "])"
-        return result
+        return "MyList([" + ", ".join(repr(data) for data in self) + "])"
 
     def __str__(self) -> str:
-        if self.head is None:
-            return "[]"
-        result = "["
-        current = self.head
-        for _ in range(self._size):
-            result += str(current.data)
-            current = current.next
-            if current is not self.head: 
-                result += ", "
-        result += "]"
+        return "[" + ", ".join(str(data) for data in self) + "]"
+
+
+def merge(*sorted_lists: MyList[T], key: Optional[Callable] = None, reverse: bool = False) -> MyList[T]:
+    """k-путевое слияние MyList, отсортированных (в порядке обхода) по key, в новый MyList.
+
+    Куча по головам списков: O(n log k). Устойчиво - при равных ключах раньше идут
+    элементы списка, переданного раньше. reverse - списки отсортированы по убыванию.
+    """
+    return MyList.from_ordered(heapq.merge(*sorted_lists, key=key, reverse=reverse))
+
+
+# --- Тестирование ---
+if __name__ == "__main__":
+    import random
+
+    rng = random.Random(1)
+    values = [rng.randrange(100) for _ in range(1000)]
+    my_list = MyList.from_iterable(values)
+
+    def chunks(lst: MyList) -> list:
+        result, chunk = [], lst.head
+        while chunk is not None:
+            result.append(chunk)
+            chunk = chunk.next
         return result
 
+    before = chunks(my_list)
+    my_list.sort(key=lambda v: v % 10)
+    # Сортировка переписывает элементы в тех же блоках
+    assert all(a is b for a, b in zip(before, chunks(my_list))) and len(before) == len(chunks(my_list))
+    assert list(my_list) == sorted(reversed(values), key=lambda v: v % 10)
+    my_list.sort(reverse=True)
+    assert list(my_list) == sorted(values, reverse=True) and len(my_list) == len(values)
+
+    odd = MyList.from_ordered([1, 3, 5, 7])
+    even = MyList.from_ordered([2, 3, 6])
+    assert list(merge(odd, even)) == [1, 2, 3, 3, 5, 6, 7]
+    assert list(merge(MyList.from_ordered([7, 3]), MyList.from_ordered([6, 2]), reverse=True)) == [7, 6, 3, 2]
+    assert list(merge()) == [] and list(merge(MyList(), odd)) == [1, 3, 5, 7]
+    print("MyList.sort / merge: ok")
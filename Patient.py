@@ -3,6 +3,9 @@
 from DateNew import DateNew # Импортируем наш новый класс даты
 
 class Patient:
+    # Записей много - храним поля в __slots__ без словаря на каждый экземпляр
+    __slots__ = ("oms_policy", "full_name", "birth_date")
+
     # Убрано значение по умолчанию = None для birth_date
     def __init__(self, oms_policy: int, full_name: str, birth_date: DateNew):
         self.validate_oms_policy(oms_policy)
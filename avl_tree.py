@@ -1,33 +1,206 @@
 # avl_tree.py
 
-# Импортируем нашу собственную реализацию списка для цепочек
-from List import MyList
+import copy
+import itertools
 from typing import Optional, Iterator, Generic, TypeVar
 
+from paged_array import PagedDict
+
 T = TypeVar('T')
 
+# Номера поколений для снимков: узел и цепочка помечаются поколением дерева, которое
+# их создало, и меняются на месте только им; чужие (общие со снимком) сначала копируются
+_epochs = itertools.count(1)
+
+
+class IndexChain:
+    """Цепочка индексов узла с неуникальным ключом.
+
+    Индексы - ключи словаря (он помнит порядок добавления): append и remove за O(1)
+    вместо прохода по кольцу MyList. Обход - от последнего добавленного к первому,
+    как у MyList, поэтому печать дерева не меняется. Индекс входит в цепочку один раз.
+    """
+    __slots__ = ("_indices", "epoch")
+
+    def __init__(self, epoch: int = 0) -> None:
+        self._indices: dict = {}
+        # Поколение дерева-владельца (см. AVLTree.snapshot)
+        self.epoch: int = epoch
+
+    def copy(self, epoch: int) -> "IndexChain":
+        chain = IndexChain(epoch)
+        chain._indices = self._indices.copy()
+        return chain
+
+    def append(self, value: int) -> None:
+        self._indices[value] = None
+
+    def remove(self, value: int) -> int:
+        try:
+            del self._indices[value]
+        except KeyError:
+            raise ValueError(f"{value!r} not in chain") from None
+        return value
+
+    def __contains__(self, value: int) -> bool:
+        return value in self._indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __iter__(self) -> Iterator[int]:
+        return reversed(self._indices.keys())
+
+    def __repr__(self) -> str:
+        return f"IndexChain({list(self)})"
+
 
 class AVLNode(Generic[T]):
-    def __init__(self, key: T, value: int) -> None:
+    # __slots__: узлов миллионы, поэтому без __dict__ на каждый
+    __slots__ = ("key", "values", "left", "right", "height", "size", "epoch")
+
+    def __init__(self, key: T, value: int, epoch: int = 0) -> None:
         self.key: T = key
-        # Используем MyList (циклический, не сортирующий) для хранения цепочки индексов
+        # Цепочка индексов для неуникального ключа
         # Соответствует требованию: "для авл и кч – описание цепочки в случае неуникального ключа"
-        self.values: MyList[int] = MyList[int]()
+        self.values: IndexChain = IndexChain(epoch)
         self.values.append(value)
         self.left: Optional[AVLNode[T]] = None
         self.right: Optional[AVLNode[T]] = None
         self.height: int = 1
+        # Число узлов в поддереве (порядковая статистика: rank/select/slice)
+        self.size: int = 1
+        # Поколение дерева, которое может менять узел на месте
+        self.epoch: int = epoch
+
+
+class AVLCursor(Generic[T]):
+    """Курсор по узлам AVLTree в порядке ключей: seek/next/prev, O(1) амортизированно на шаг.
+
+    Хранит путь от корня до текущего узла (свой стек, без рекурсивных генераторов),
+    поэтому обход можно начать с любого ключа, прервать и продолжить. Шаг за край не
+    сбрасывает позицию: курсор стоит "за концом" (или "перед началом") у крайнего узла,
+    и шаг обратно возвращает этот узел. Запись в дерево
+    делает позицию недействительной: для чтения во время записей курсор открывают на
+    snapshot() дерева или после записи заново вызывают seek(ключ).
+    """
+    __slots__ = ("_tree", "_path", "_edge")
+
+    def __init__(self, tree: 'AVLTree[T]') -> None:
+        self._tree = tree
+        self._path: list = []
+        # 0 - на узле пути; 1 - за концом, -1 - перед началом (путь - до крайнего узла)
+        self._edge: int = 0
+
+    @property
+    def current(self) -> Optional[AVLNode[T]]:
+        # Текущий узел или None, если курсор вышел за край
+        return self._path[-1] if self._path and not self._edge else None
+
+    def first(self) -> Optional[AVLNode[T]]:
+        self._path = []
+        self._edge = 0
+        self._descend(self._tree.root, True)
+        return self.current
+
+    def last(self) -> Optional[AVLNode[T]]:
+        self._path = []
+        self._edge = 0
+        self._descend(self._tree.root, False)
+        return self.current
+
+    def seek(self, key: T) -> Optional[AVLNode[T]]:
+        """Встаёт на первый узел с ключом >= key (None - таких нет: курсор за концом)."""
+        compare = getattr(key, "compare", None)
+        path = self._path = []
+        keep = 0
+        node = self._tree.root
+        while node is not None:
+            path.append(node)
+            if compare is not None:
+                go_left = compare(node.key) <= 0
+            else:
+                go_left = not node.key < key
+            if go_left:
+                # Кандидат; левее могут быть ещё подходящие ключи поменьше
+                keep = len(path)
+                node = node.left
+            else:
+                node = node.right
+        if keep == 0 and path:
+            # Все ключи меньше key: спуск шёл только вправо и кончился на последнем узле
+            self._edge = 1
+        else:
+            del path[keep:]
+            self._edge = 0
+        return self.current
+
+    def _descend(self, node: Optional[AVLNode[T]], leftmost: bool) -> None:
+        path = self._path
+        while node is not None:
+            path.append(node)
+            node = node.left if leftmost else node.right
+
+    def next(self) -> Optional[AVLNode[T]]:
+        """Переходит к следующему ключу и возвращает его узел (None - дальше ничего нет)."""
+        return self._step(True)
+
+    def prev(self) -> Optional[AVLNode[T]]:
+        """Переходит к предыдущему ключу и возвращает его узел (None - раньше ничего нет)."""
+        return self._step(False)
+
+    def _step(self, forward: bool) -> Optional[AVLNode[T]]:
+        path = self._path
+        if not path:
+            return None
+        if self._edge:
+            # За краем: шаг обратно возвращает крайний узел, шаг дальше - None
+            if (self._edge > 0) != forward:
+                self._edge = 0
+            return self.current
+        node = path[-1]
+        child = node.right if forward else node.left
+        if child is not None:
+            # Следующий - крайний узел поддерева с нужной стороны
+            self._descend(child, forward)
+        else:
+            # Поднимаемся, пока приходим в предка с той же стороны, куда идём
+            popped = [path.pop()]
+            while path and (path[-1].right if forward else path[-1].left) is popped[-1]:
+                popped.append(path.pop())
+            if not path:
+                # Узел был крайним: возвращаем путь и встаём за край
+                path.extend(reversed(popped))
+                self._edge = 1 if forward else -1
+        return self.current
+
+    def __iter__(self) -> Iterator[AVLNode[T]]:
+        # Узлы от текущего вперёд; после break курсор стоит на первом невыданном узле
+        node = self.current
+        while node is not None:
+            self.next()
+            yield node
+            node = self.current
 
 
 class AVLTree(Generic[T]):
     def __init__(self) -> None:
         # self._key_type = ... # Опционально, можно оставить или убрать _assert_type
         self.root: Optional[AVLNode[T]] = None
+        self._epoch: int = next(_epochs)
+        # Обратный индекс: значение (индекс записи) -> ключ, под которым оно лежит.
+        # Значение входит в дерево под одним ключом, поэтому удалить или перенести его
+        # можно за O(log n), не зная ключа. Словарь страничный: снимок делит страницы,
+        # и запись копирует только страницу своего значения
+        self._key_by_value: PagedDict = PagedDict()
 
     def __len__(self) -> int:
-        def count(node: Optional[AVLNode[T]]) -> int:
-            return 0 if node is None else 1 + count(node.left) + count(node.right)
-        return count(self.root)
+        # Число различных ключей - размер поддерева корня, O(1)
+        return self.root.size if self.root is not None else 0
+
+    @property
+    def height(self) -> int:
+        return self.root.height if self.root is not None else 0
 
     # _assert_type можно оставить, но часто в дженериках не используется внутри СД
     # def _assert_type(self, key: T) -> None:
@@ -37,13 +210,55 @@ class AVLTree(Generic[T]):
         return node.height if node else 0
 
     def _update_height(self, node: AVLNode[T]) -> None:
-        node.height = max(self._get_height(node.left), self._get_height(node.right)) + 1
+        # Пересчитывает высоту и размер поддерева по детям (дети уже актуальны)
+        left, right = node.left, node.right
+        node.height = max(self._get_height(left), self._get_height(right)) + 1
+        node.size = (left.size if left is not None else 0) + (right.size if right is not None else 0) + 1
 
     def _get_balance(self, node: Optional[AVLNode[T]]) -> int:
         return self._get_height(node.left) - self._get_height(node.right) if node else 0
 
+    # --- Снимки (копирование пути при записи) ---
+    def snapshot(self) -> 'AVLTree[T]':
+        """Неизменяемый снимок дерева за O(1).
+
+        Снимок и дерево делят все узлы; оба получают новые поколения, поэтому любая
+        последующая запись (в дерево или в снимок) копирует только узлы на своём пути
+        от корня - O(log n) копий на операцию, - а другая сторона их не видит.
+        Читатели снимка не блокируют вставки и не видят половинчатых изменений.
+        """
+        snap = copy.copy(self)
+        snap._key_by_value = self._key_by_value.copy()
+        snap._epoch = next(_epochs)
+        self._epoch = next(_epochs)
+        return snap
+
+    def _own(self, node: AVLNode[T]) -> AVLNode[T]:
+        # Узел, который можно менять на месте: свой - как есть, общий со снимком - копия
+        if node.epoch == self._epoch:
+            return node
+        clone = AVLNode.__new__(AVLNode)
+        clone.key, clone.values = node.key, node.values
+        clone.left, clone.right = node.left, node.right
+        clone.height, clone.size = node.height, node.size
+        clone.epoch = self._epoch
+        return clone
+
+    def _own_path(self, path: list, went_left: list) -> None:
+        # Сверху вниз заменяет общие узлы пути копиями и перевешивает их к (уже своему) родителю
+        for i, node in enumerate(path):
+            if node.epoch != self._epoch:
+                path[i] = self._own(node)
+                self._replace_child(path, went_left, i, path[i])
+
+    def _own_values(self, node: AVLNode[T]) -> IndexChain:
+        # Цепочку своего узла можно менять, только если она не общая со снимком
+        if node.values.epoch != self._epoch:
+            node.values = node.values.copy(self._epoch)
+        return node.values
+
     def _rotate_right(self, y: AVLNode[T]) -> AVLNode[T]:
-        x = y.left
+        x = self._own(y.left)
         t2 = x.right
         x.right, y.left = y, t2
         self._update_height(y)
@@ -51,134 +266,396 @@ class AVLTree(Generic[T]):
         return x
 
     def _rotate_left(self, x: AVLNode[T]) -> AVLNode[T]:
-        y = x.right
+        y = self._own(x.right)
         t2 = y.left
         y.left, x.right = x, t2
         self._update_height(x)
         self._update_height(y)
         return y
 
+    # --- Спуск с трёхсторонним сравнением ---
+    # Ключ с методом compare(other) -> -1/0/1 (DateNew) сравнивается одним вызовом;
+    # для int/str достаточно встроенных < и == без вызова Python-функций
+    def _path_to(self, key: T) -> tuple:
+        # Спуск от корня: (найденный узел или None, путь предков, направления: True - влево)
+        compare = getattr(key, "compare", None)
+        path = []
+        went_left = []
+        node = self.root
+        while node is not None:
+            if compare is not None:
+                c = compare(node.key)
+            elif key < node.key:
+                c = -1
+            elif key == node.key:
+                c = 0
+            else:
+                c = 1
+            if c == 0:
+                return node, path, went_left
+            path.append(node)
+            went_left.append(c < 0)
+            node = node.left if c < 0 else node.right
+        return None, path, went_left
+
+    def _rebalance_path(self, path: list, went_left: list, size_delta: int) -> None:
+        # Снизу вверх пересчитывает высоты и балансирует узлы пути после вставки/удаления.
+        # Размер меняется у всех узлов пути - правим его сразу, до поворотов (повороты
+        # пересчитывают размер по детям). Если поддерево сохранило высоту, выше ничего
+        # не меняется - останавливаемся
+        for node in path:
+            node.size += size_delta
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = node.height
+            self._update_height(node)
+            balance = self._get_balance(node)
+            subtree = node
+            if balance > 1:
+                if self._get_balance(node.left) < 0:
+                    node.left = self._rotate_left(self._own(node.left))
+                subtree = self._rotate_right(node)
+            elif balance < -1:
+                if self._get_balance(node.right) > 0:
+                    node.right = self._rotate_right(self._own(node.right))
+                subtree = self._rotate_left(node)
+            if subtree is not node:
+                self._replace_child(path, went_left, i, subtree)
+            if subtree.height == old_height:
+                return
+
+    def _replace_child(self, path: list, went_left: list, i: int, subtree: Optional[AVLNode[T]]) -> None:
+        # Ставит subtree на место path[i] у его родителя (или в корень)
+        if i == 0:
+            self.root = subtree
+        elif went_left[i - 1]:
+            path[i - 1].left = subtree
+        else:
+            path[i - 1].right = subtree
+
     def insert(self, key: T, value: int) -> AVLNode[T]:
         # if not isinstance(value, int): # Проверка типа value
         #     raise TypeError(f"value must be int, not {type(value).__name__}")
-        self.root = self._insert(self.root, key, value)
-        return self.find(key)  # type: ignore[arg-type]
-
-    def _insert(self, node: Optional[AVLNode[T]], key: T, value: int) -> AVLNode[T]:
-        if node is None:
-            return AVLNode(key, value)
-        if key < node.key:
-            node.left = self._insert(node.left, key, value)
-        elif key > node.key:
-            node.right = self._insert(node.right, key, value)
-        else:
-            # Ключ уже существует -> добавляем значение в цепочку (MyList)
-            node.values.append(value)
+        # Итеративно: один спуск, одно трёхстороннее сравнение на уровень, без рекурсии
+        node, path, went_left = self._path_to(key)
+        if value in self._key_by_value:
+            if node is not None and value in node.values:
+                return node
+            raise ValueError(f"Value {value!r} is already indexed under key {self._key_by_value[value]!r}")
+        self._key_by_value[value] = key
+        if node is not None:
+            # Ключ уже существует -> добавляем значение в цепочку
+            path.append(node)
+            self._own_path(path, went_left)
+            node = path[-1]
+            self._own_values(node).append(value)
             return node
-
-        self._update_height(node)
-        balance = self._get_balance(node)
-        # Балансировка дерева
-        if balance > 1 and key < node.left.key:
-            return self._rotate_right(node)
-        if balance < -1 and key > node.right.key:
-            return self._rotate_left(node)
-        if balance > 1 and key > node.left.key:
-            node.left = self._rotate_left(node.left)
-            return self._rotate_right(node)
-        if balance < -1 and key < node.right.key:
-            node.right = self._rotate_right(node.right)
-            return self._rotate_left(node)
+        self._own_path(path, went_left)
+        node = AVLNode(key, value, self._epoch)
+        if not path:
+            self.root = node
+            return node
+        if went_left[-1]:
+            path[-1].left = node
+        else:
+            path[-1].right = node
+        self._rebalance_path(path, went_left, 1)
         return node
 
     def find(self, key: T) -> Optional[AVLNode[T]]:
         # self._assert_type(key) # Опционально
-        return self._find(self.root, key)
+        compare = getattr(key, "compare", None)
+        node = self.root
+        if compare is None:
+            while node is not None:
+                if key < node.key:
+                    node = node.left
+                elif key == node.key:
+                    return node
+                else:
+                    node = node.right
+            return None
+        while node is not None:
+            c = compare(node.key)
+            if c == 0:
+                return node
+            node = node.left if c < 0 else node.right
+        return None
 
-    def _find(self, node: Optional[AVLNode[T]], key: T) -> Optional[AVLNode[T]]:
-        if node is None:
+    def get(self, key: T) -> Optional[IndexChain]:
+        # Быстрый поиск без подсчёта шагов: цепочка индексов по ключу или None
+        node = self.find(key)
+        return node.values if node is not None else None
+
+    def find_steps(self, key: T) -> tuple:
+        # Инструментированный поиск для отображения: (узел или None, количество шагов)
+        compare = getattr(key, "compare", None)
+        node = self.root
+        steps = 0
+        while node is not None:
+            steps += 1
+            if compare is not None:
+                c = compare(node.key)
+            elif key < node.key:
+                c = -1
+            else:
+                c = 0 if key == node.key else 1
+            if c == 0:
+                return node, steps
+            node = node.left if c < 0 else node.right
+        return None, steps
+
+    def __iter__(self) -> Iterator['AVLNode[T]']:
+        # Симметричный обход со своим стеком (без рекурсивных генераторов)
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+
+    def cursor(self, key: Optional[T] = None) -> AVLCursor[T]:
+        # Курсор на первом ключе >= key (без key - на наименьшем)
+        cursor = AVLCursor(self)
+        if key is None:
+            cursor.first()
+        else:
+            cursor.seek(key)
+        return cursor
+
+    def bulk_load(self, pairs) -> None:
+        """Строит пустое дерево сразу из пар (ключ, значение) - для загрузки из файла.
+
+        Пары сортируются (устойчиво, поэтому цепочки совпадают с поэлементными
+        insert в том же порядке), равные ключи склеиваются в одну цепочку, и из
+        середин отрезков собирается идеально сбалансированное дерево за O(n)
+        после сортировки, без поворотов.
+        """
+        if self.root is not None:
+            raise ValueError("bulk_load requires an empty tree")
+        nodes = []
+        key_map = self._key_by_value
+        for key, value in sorted(pairs, key=lambda pair: pair[0]):
+            if nodes and nodes[-1].key == key:
+                if value not in nodes[-1].values and value in key_map:
+                    raise ValueError(f"Value {value!r} is already indexed under key {key_map[value]!r}")
+                nodes[-1].values.append(value)
+            else:
+                if value in key_map:
+                    raise ValueError(f"Value {value!r} is already indexed under key {key_map[value]!r}")
+                nodes.append(AVLNode(key, value, self._epoch))
+            key_map[value] = key
+        self.root = self._build_balanced(nodes, 0, len(nodes))
+
+    def _build_balanced(self, nodes: list, lo: int, hi: int) -> Optional[AVLNode[T]]:
+        # Корень - середина отрезка; глубина рекурсии - log2(n)
+        if lo >= hi:
             return None
-        if key < node.key:
-            return self._find(node.left, key)
-        if key > node.key:
-            return self._find(node.right, key)
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        left = node.left = self._build_balanced(nodes, lo, mid)
+        right = node.right = self._build_balanced(nodes, mid + 1, hi)
+        # Левая половина не короче правой, поэтому высота берётся по ней
+        node.height = (left.height if left is not None else 0) + 1
+        node.size = hi - lo
         return node
 
-    def __iter__(self) -> Iterator['AVLNode[T]']:
-        yield from self._value_gen(self.root)
+    # --- Порядковая статистика (по различным ключам, O(log n)) ---
+    def rank(self, key: T) -> int:
+        """Число ключей строго меньше key (позиция key в порядке ключей, если он есть)."""
+        compare = getattr(key, "compare", None)
+        rank = 0
+        node = self.root
+        while node is not None:
+            if compare is not None:
+                go_left = compare(node.key) <= 0
+            else:
+                go_left = not node.key < key
+            if go_left:
+                node = node.left
+            else:
+                rank += (node.left.size if node.left is not None else 0) + 1
+                node = node.right
+        return rank
+
+    def select(self, i: int) -> AVLNode[T]:
+        """Узел с i-м по возрастанию ключом (с нуля); IndexError вне [0, len)."""
+        if not 0 <= i < len(self):
+            raise IndexError("AVLTree index out of range")
+        node = self.root
+        while True:
+            left_size = node.left.size if node.left is not None else 0
+            if i < left_size:
+                node = node.left
+            elif i == left_size:
+                return node
+            else:
+                i -= left_size + 1
+                node = node.right
+
+    def slice(self, offset: int, limit: int) -> list:
+        """Страница узлов: не больше limit узлов начиная с offset-го по порядку ключей.
+
+        Спуск к offset-му узлу - O(log n), далее симметричный обход: O(log n + limit).
+        """
+        page = []
+        if offset < 0 or limit <= 0:
+            return page
+        # Стек - предки, в которых спуск ушёл влево (они идут после offset-го узла)
+        stack = []
+        node = self.root
+        while node is not None:
+            left_size = node.left.size if node.left is not None else 0
+            if offset < left_size:
+                stack.append(node)
+                node = node.left
+            elif offset == left_size:
+                stack.append(node)
+                break
+            else:
+                offset -= left_size + 1
+                node = node.right
+        while stack and len(page) < limit:
+            node = stack.pop()
+            page.append(node)
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+        return page
 
-    def _value_gen(self, node: Optional['AVLNode[T]']) -> Iterator['AVLNode[T]']:
-        if node:
-            yield from self._value_gen(node.left)
+    def range(self, lo: Optional[T] = None, hi: Optional[T] = None) -> Iterator['AVLNode[T]']:
+        """Узлы с lo <= key <= hi по возрастанию ключа (None - граница не задана).
+
+        Заходит только в поддеревья, которые могут пересекать отрезок: O(log n + k).
+        """
+        lo_compare = getattr(lo, "compare", None)
+        hi_compare = getattr(hi, "compare", None)
+
+        def above_lo(key: T) -> bool:
+            # lo <= key
+            if lo is None:
+                return True
+            return lo_compare(key) <= 0 if lo_compare is not None else not key < lo
+
+        def below_hi(key: T) -> bool:
+            # key <= hi
+            if hi is None:
+                return True
+            return hi_compare(key) >= 0 if hi_compare is not None else not hi < key
+
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            # Спускаемся влево, пока ключи не меньше lo; левее - только меньшие lo
+            while node is not None:
+                if above_lo(node.key):
+                    stack.append(node)
+                    node = node.left
+                else:
+                    node = node.right
+            if not stack:
+                # Все оставшиеся ключи меньше lo (например, lo больше максимального ключа)
+                return
+            node = stack.pop()
+            if not below_hi(node.key):
+                return
             yield node
-            yield from self._value_gen(node.right)
+            node = node.right
 
     def delete_node(self, key: T) -> Optional[AVLNode[T]]:
         # self._assert_type(key) # Опционально
-        node = self.find(key)
-        self.root = self._delete_node(self.root, key)
-        return node
-
-    def _delete_node(self, node: Optional[AVLNode], key: T) -> Optional[AVLNode]: # Исправлен тип параметра
+        # Итеративно; удалённый узел возвращается как есть (с его ключом и цепочкой)
+        node, path, went_left = self._path_to(key)
         if node is None:
             return None
-        if key < node.key:
-            node.left = self._delete_node(node.left, key)
-        elif key > node.key:
-            node.right = self._delete_node(node.right, key)
+        key_map = self._key_by_value
+        for value in node.values:
+            del key_map[value]
+        if node.left is None or node.right is None:
+            self._own_path(path, went_left)
+            path.append(node)
+            self._replace_child(path, went_left, len(path) - 1, node.left or node.right)
+            path.pop()
         else:
-            # Найден узел для удаления
-            if node.left is None:
-                return node.right
-            if node.right is None:
-                return node.left
-            # Найдем наследника (минимальный элемент в правом поддереве)
-            successor = self.min_value_node(node.right)
-            # Скопируем данные наследника в текущий узел
-            node.key, node.values = successor.key, successor.values
-            # Удалим наследника
-            node.right = self._delete_node(node.right, successor.key)
-        self._update_height(node)
-        balance = self._get_balance(node)
-        # Балансировка после удаления
-        if balance > 1 and self._get_balance(node.left) >= 0:
-            return self._rotate_right(node)
-        if balance > 1 and self._get_balance(node.left) < 0:
-            node.left = self._rotate_left(node.left)
-            return self._rotate_right(node)
-        if balance < -1 and self._get_balance(node.right) <= 0:
-            return self._rotate_left(node)
-        if balance < -1 and self._get_balance(node.right) > 0:
-            node.right = self._rotate_right(node.right)
-            return self._rotate_left(node)
+            # Наследник (минимальный элемент в правом поддереве) встаёт на место узла
+            position = len(path)
+            path.append(node)
+            went_left.append(False)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                went_left.append(True)
+                successor = successor.left
+            self._own_path(path, went_left)
+            node = path[position]
+            successor = self._own(successor)
+            # Вырезаем наследника: его место занимает правое поддерево наследника
+            if path[-1] is node:
+                node.right = successor.right
+            else:
+                path[-1].left = successor.right
+            successor.left, successor.right = node.left, node.right
+            successor.height, successor.size = node.height, node.size
+            self._replace_child(path, went_left, position, successor)
+            path[position] = successor
+        if node.epoch == self._epoch:
+            # Общий со снимком узел остаётся в снимке нетронутым
+            node.left = node.right = None
+            node.height = node.size = 1
+        self._rebalance_path(path, went_left, -1)
         return node
 
+    def key_of(self, value: int) -> Optional[T]:
+        # Ключ, под которым лежит значение, или None - O(1) по обратному индексу
+        return self._key_by_value.get(value)
+
     def delete_by_value_only(self, value: int) -> bool:
-        def traverse_and_delete(node):
-            if node is None:
-                return False
-            if value in node.values:
-                node.values.remove(value)
-                if len(node.values) == 0:
-                    self.delete_node(node.key)
-                return True
-            return traverse_and_delete(node.left) or traverse_and_delete(node.right)
+        # Ключ берётся из обратного индекса: O(log n) вместо обхода всего дерева
+        if value not in self._key_by_value:
+            return False
+        return self.delete_value(self._key_by_value[value], value)
+
+    def move_value(self, old_value: int, new_value: int) -> bool:
+        """Переносит значение под тем же ключом (запись переехала на другой индекс).
 
-        return traverse_and_delete(self.root)
+        Ключ берётся из обратного индекса, поэтому вызывающему он не нужен; new_value
+        становится последним добавленным в цепочке, как после delete_value + insert.
+        """
+        if old_value not in self._key_by_value:
+            return False
+        key_map = self._key_by_value
+        if new_value in key_map:
+            raise ValueError(f"Value {new_value!r} is already indexed under key {key_map[new_value]!r}")
+        key = key_map[old_value]
+        # Узел остаётся на месте - меняется только цепочка, без поворотов
+        node, path, went_left = self._path_to(key)
+        path.append(node)
+        self._own_path(path, went_left)
+        chain = self._own_values(path[-1])
+        chain.remove(old_value)
+        chain.append(new_value)
+        del key_map[old_value]
+        key_map[new_value] = key
+        return True
 
     def delete_value(self, key: T, value: int) -> bool:
         # self._assert_type(key) # Опционально
         # if not isinstance(value, int): # Проверка типа value
         #     raise TypeError(f"value must be int, not {type(value).__name__}")
-        node = self.find(key)
-        if node is None:
+        node, path, went_left = self._path_to(key)
+        if node is None or value not in node.values:
             return False
-        try:
-            node.values.remove(value)
-        except ValueError:
-            return False
-        if len(node.values) == 0:
+        if len(node.values) == 1:
             self.delete_node(key)
+            return True
+        path.append(node)
+        self._own_path(path, went_left)
+        self._own_values(path[-1]).remove(value)
+        del self._key_by_value[value]
         return True
 
     @staticmethod
@@ -201,3 +678,31 @@ class AVLTree(Generic[T]):
             return s
 
         return node_str(getattr(self, 'root', None)).rstrip()
+
+
+# --- Тестирование ---
+if __name__ == "__main__":
+    tree = AVLTree[int]()
+    for k in (10, 20, 30, 40, 50):
+        tree.insert(k, k)
+    assert [node.key for node in tree.range(20, 40)] == [20, 30, 40]
+    # Отрезок правее всех ключей и левее всех ключей - пустой результат, а не IndexError
+    assert list(tree.range(60, 100)) == []
+    assert list(tree.range(60)) == []
+    assert list(tree.range(0, 5)) == []
+    assert list(tree.range(None, 5)) == []
+    assert list(AVLTree[int]().range(1, 2)) == []
+    print("AVLTree.range: ok")
+
+    # Курсор у краёв: шаг за край паркует его, шаг обратно возвращает крайний ключ
+    cursor = tree.cursor()
+    assert [node.key for node in cursor] == [10, 20, 30, 40, 50]
+    assert cursor.current is None and cursor.next() is None
+    assert cursor.prev().key == 50 and cursor.prev().key == 40
+    cursor.first()
+    assert cursor.prev() is None and cursor.prev() is None and cursor.next().key == 10
+    assert cursor.seek(60) is None and cursor.prev().key == 50
+    assert cursor.seek(35).key == 40 and cursor.prev().key == 30
+    empty_cursor = AVLTree[int]().cursor()
+    assert empty_cursor.next() is None and empty_cursor.prev() is None
+    print("AVLCursor edges: ok")
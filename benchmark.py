@@ -0,0 +1,533 @@
+# benchmark.py - Замеры памяти и скорости структур данных
+#
+# Запуск: python benchmark.py <замер> [параметры], например:
+#     python benchmark.py hash-memory --size 1000000
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List, Optional
+
+import avl_tree
+import bplus_tree
+import database
+import hash_index
+import hash_table
+from avl_tree import AVLTree, AVLNode
+from bplus_tree import BPlusTree
+from database import RelationalDatabase
+from DateNew import DateNew, MONTHS_NAMES
+from hash_table import HashTable, STORAGE_TYPES
+from parser import format_fields
+
+
+def random_oms_keys(count: int, seed: int = 0) -> List[int]:
+    """Уникальные случайные 16-значные полисы ОМС."""
+    rnd = random.Random(seed)
+    return rnd.sample(range(10 ** 15, 10 ** 16), count)
+
+
+def measure_memory(build) -> tuple:
+    """Вызывает build() под tracemalloc; возвращает (результат, байт удержано)."""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def measure_time(build) -> tuple:
+    """Вызывает build() без трассировки памяти; возвращает (результат, секунд)."""
+    started = time.perf_counter()
+    result = build()
+    return result, time.perf_counter() - started
+
+
+# --- ХТ: раскладка ячеек ---
+def bench_hash_memory(size: int, seed: int = 0) -> List[dict]:
+    keys = random_oms_keys(size, seed)
+    rows = []
+    for storage in STORAGE_TYPES:
+        def build():
+            ht = HashTable(resizable=True, storage=storage, hash_strategy="mix64")
+            for index, key in enumerate(keys):
+                ht.insert(key, index)
+            return ht
+
+        _, nbytes = measure_memory(build)
+        ht, insert_seconds = measure_time(build)
+        started = time.perf_counter()
+        for key in keys:
+            ht.search(key)
+        search_seconds = time.perf_counter() - started
+        rows.append({
+            "storage": storage,
+            "capacity": ht.capacity,
+            "bytes": nbytes,
+            "bytes_per_slot": nbytes / ht.capacity,
+            "bytes_per_entry": nbytes / size,
+            "insert_seconds": insert_seconds,
+            "search_seconds": search_seconds,
+        })
+        del ht
+    return rows
+
+
+def print_hash_memory(rows: List[dict]) -> None:
+    print(f"{'storage':<10}{'capacity':>12}{'MiB':>10}{'B/slot':>10}{'B/entry':>10}"
+          f"{'insert s':>10}{'search s':>10}")
+    for r in rows:
+        print(f"{r['storage']:<10}{r['capacity']:>12}{r['bytes'] / 2 ** 20:>10.1f}"
+              f"{r['bytes_per_slot']:>10.1f}{r['bytes_per_entry']:>10.1f}"
+              f"{r['insert_seconds']:>10.2f}{r['search_seconds']:>10.2f}")
+
+
+# --- ХТ: добавления/удаления и могилы ---
+CHURN_VARIANTS = {
+    "linear, no purge": dict(tombstone_threshold=None),
+    "linear + purge": dict(),
+    "robin hood": dict(robin_hood=True),
+}
+
+
+def bench_hash_churn(size: int, rounds: int, seed: int = 0) -> List[dict]:
+    """Заполняет БД size пациентами и делает rounds пар удаление+добавление,
+    после чего считает шаги find_patient_steps для всех пациентов и для промахов."""
+    rows = []
+    for variant, options in CHURN_VARIANTS.items():
+        rnd = random.Random(seed)
+        # Статическая таблица: без роста могилы копятся, пока их никто не чистит
+        capacity = int(size / 0.7)
+        ht = HashTable(capacity=capacity, storage="compact", hash_strategy="mix64", **options)
+        db = RelationalDatabase(max_size=size, patient_ht=ht, instrumented=True)
+        live = random_oms_keys(size, seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for oms in live:
+                db.add_patient(oms, "Иванов Иван Иванович", "01 янв 1980")
+            for _ in range(rounds):
+                victim = live.pop(rnd.randrange(len(live)))
+                db.delete_patient(victim)
+                oms = rnd.randrange(10 ** 15, 10 ** 16)
+                if db.add_patient(oms, "Петров Пётр Петрович", "02 фев 1990"):
+                    live.append(oms)
+
+        hit_steps = [db.find_patient_steps(oms)[1] for oms in live]
+        miss_steps = [db.find_patient_steps(rnd.randrange(10 ** 15, 10 ** 16))[1] for _ in range(len(live))]
+        rows.append({
+            "variant": variant,
+            "tombstones": ht.tombstones,
+            "avg_hit": sum(hit_steps) / len(hit_steps),
+            "max_hit": max(hit_steps),
+            "avg_miss": sum(miss_steps) / len(miss_steps),
+            "max_miss": max(miss_steps),
+        })
+    return rows
+
+
+def print_hash_churn(rows: List[dict]) -> None:
+    print(f"{'variant':<18}{'tombstones':>12}{'avg hit':>10}{'max hit':>10}{'avg miss':>10}{'max miss':>10}")
+    for r in rows:
+        print(f"{r['variant']:<18}{r['tombstones']:>12}{r['avg_hit']:>10.2f}{r['max_hit']:>10}"
+              f"{r['avg_miss']:>10.2f}{r['max_miss']:>10}")
+
+
+# --- AVL: итеративный движок против прежнего рекурсивного ---
+class RecursiveAVLTree(AVLTree):
+    """Прежний рекурсивный движок вставки/удаления (два сравнения на уровень,
+    повторный find после вставки) - эталон для сравнения."""
+
+    def insert(self, key, value: int) -> AVLNode:
+        self.root = self._insert(self.root, key, value)
+        return self.find(key)
+
+    def _insert(self, node, key, value: int) -> AVLNode:
+        if node is None:
+            return AVLNode(key, value, self._epoch)
+        if key < node.key:
+            node.left = self._insert(node.left, key, value)
+        elif key > node.key:
+            node.right = self._insert(node.right, key, value)
+        else:
+            node.values.append(value)
+            return node
+        self._update_height(node)
+        balance = self._get_balance(node)
+        if balance > 1 and key < node.left.key:
+            return self._rotate_right(node)
+        if balance < -1 and key > node.right.key:
+            return self._rotate_left(node)
+        if balance > 1 and key > node.left.key:
+            node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1 and key < node.right.key:
+            node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
+    def find(self, key) -> Optional[AVLNode]:
+        return self._find(self.root, key)
+
+    def _find(self, node, key) -> Optional[AVLNode]:
+        if node is None:
+            return None
+        if key < node.key:
+            return self._find(node.left, key)
+        if key > node.key:
+            return self._find(node.right, key)
+        return node
+
+    def delete_node(self, key) -> Optional[AVLNode]:
+        node = self.find(key)
+        self.root = self._delete_node(self.root, key)
+        return node
+
+    def _delete_node(self, node, key):
+        if node is None:
+            return None
+        if key < node.key:
+            node.left = self._delete_node(node.left, key)
+        elif key > node.key:
+            node.right = self._delete_node(node.right, key)
+        else:
+            if node.left is None:
+                return node.right
+            if node.right is None:
+                return node.left
+            successor = self.min_value_node(node.right)
+            node.key, node.values = successor.key, successor.values
+            node.right = self._delete_node(node.right, successor.key)
+        self._update_height(node)
+        balance = self._get_balance(node)
+        if balance > 1 and self._get_balance(node.left) >= 0:
+            return self._rotate_right(node)
+        if balance > 1 and self._get_balance(node.left) < 0:
+            node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1 and self._get_balance(node.right) <= 0:
+            return self._rotate_left(node)
+        if balance < -1 and self._get_balance(node.right) > 0:
+            node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
+
+AVL_ENGINES = {
+    "recursive": RecursiveAVLTree,
+    "iterative": AVLTree,
+}
+
+
+def random_avl_keys(kind: str, count: int, seed: int = 0) -> list:
+    """Ключи индексов БД: полисы ОМС (int), ФИО врачей (str) или даты приёма (DateNew, с повторами)."""
+    rnd = random.Random(seed)
+    if kind == "int":
+        return random_oms_keys(count, seed)
+    if kind == "str":
+        return [f"Врач{rnd.randrange(10 ** 9)} П.П." for _ in range(count)]
+    return [DateNew(f"{rnd.randrange(1, 29):02d} {MONTHS_NAMES[rnd.randrange(1, 13)]} {rnd.randrange(1950, 2030)}")
+            for _ in range(count)]
+
+
+def bench_avl(size: int, kinds: List[str], seed: int = 0) -> List[dict]:
+    rows = []
+    for kind in kinds:
+        keys = random_avl_keys(kind, size, seed)
+        for engine, tree_type in AVL_ENGINES.items():
+            tree = tree_type()
+            started = time.perf_counter()
+            for index, key in enumerate(keys):
+                tree.insert(key, index)
+            insert_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for key in keys:
+                tree.find(key)
+            find_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for key in keys:
+                tree.delete_node(key)
+            delete_seconds = time.perf_counter() - started
+            rows.append({
+                "keys": kind,
+                "engine": engine,
+                "insert_seconds": insert_seconds,
+                "find_seconds": find_seconds,
+                "delete_seconds": delete_seconds,
+            })
+    return rows
+
+
+def print_avl(rows: List[dict]) -> None:
+    print(f"{'keys':<6}{'engine':<12}{'insert s':>10}{'find s':>10}{'delete s':>10}")
+    for r in rows:
+        print(f"{r['keys']:<6}{r['engine']:<12}{r['insert_seconds']:>10.2f}{r['find_seconds']:>10.2f}"
+              f"{r['delete_seconds']:>10.2f}")
+
+
+# --- Упорядоченные индексы: AVLTree против BPlusTree ---
+ORDERED_INDEXES = {
+    "avl": AVLTree,
+    "bplus": BPlusTree,
+}
+
+
+def bench_ordered_index(size: int, kinds: List[str], range_queries: int = 1000, seed: int = 0) -> List[dict]:
+    """Вставка, поиск, диапазоны (по ~0.1% ключей) и удаление; память - отдельной сборкой под tracemalloc."""
+    rows = []
+    for kind in kinds:
+        keys = random_avl_keys(kind, size, seed)
+        ordered = sorted(keys)
+        rnd = random.Random(seed)
+        width = max(1, size // 1000)
+        windows = []
+        for _ in range(range_queries):
+            start = rnd.randrange(max(1, size - width))
+            windows.append((ordered[start], ordered[min(start + width, size - 1)]))
+
+        for name, index_type in ORDERED_INDEXES.items():
+            def build():
+                tree = index_type()
+                for index, key in enumerate(keys):
+                    tree.insert(key, index)
+                return tree
+
+            _, nbytes = measure_memory(build)
+            tree, insert_seconds = measure_time(build)
+
+            started = time.perf_counter()
+            for key in keys:
+                tree.find(key)
+            find_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            scanned = 0
+            for lo, hi in windows:
+                for _ in tree.range(lo, hi):
+                    scanned += 1
+            range_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for key in keys:
+                tree.delete_node(key)
+            delete_seconds = time.perf_counter() - started
+            rows.append({
+                "keys": kind,
+                "index": name,
+                "bytes": nbytes,
+                "insert_seconds": insert_seconds,
+                "find_seconds": find_seconds,
+                "range_seconds": range_seconds,
+                "scanned": scanned,
+                "delete_seconds": delete_seconds,
+            })
+    return rows
+
+
+def print_ordered_index(rows: List[dict]) -> None:
+    print(f"{'keys':<6}{'index':<8}{'MiB':>8}{'insert s':>10}{'find s':>10}{'range s':>10}{'delete s':>10}")
+    for r in rows:
+        print(f"{r['keys']:<6}{r['index']:<8}{r['bytes'] / 2 ** 20:>8.1f}{r['insert_seconds']:>10.2f}"
+              f"{r['find_seconds']:>10.2f}{r['range_seconds']:>10.2f}{r['delete_seconds']:>10.2f}")
+
+
+# --- Память БД на запись ---
+def synthetic_records(patients: int, appointments_per_patient: int, seed: int = 0) -> tuple:
+    """Синтетический набор: (пациенты, приёмы) в виде аргументов add_patient/add_appointment."""
+    rnd = random.Random(seed)
+    doctors = [f"Врач{i} П.П." for i in range(200)]
+    diagnoses = [f"Диагноз {i}" for i in range(50)]
+    patient_rows = []
+    appointment_rows = []
+    for oms in random_oms_keys(patients, seed):
+        birth = f"{rnd.randrange(1, 29):02d} {MONTHS_NAMES[rnd.randrange(1, 13)]} {rnd.randrange(1930, 2020)}"
+        patient_rows.append((oms, f"Фамилия{rnd.randrange(patients)} Имя Отчество", birth))
+        for _ in range(appointments_per_patient):
+            date = f"{rnd.randrange(1, 29):02d} {MONTHS_NAMES[rnd.randrange(1, 13)]} {rnd.randrange(2000, 2025)}"
+            appointment_rows.append((oms, rnd.choice(diagnoses), rnd.choice(doctors), date))
+    return patient_rows, appointment_rows
+
+
+def dict_backed(cls: type) -> type:
+    """Подкласс cls, который хранит атрибуты в __dict__ экземпляра - раскладка до __slots__.
+
+    Имена слотов перекрыты атрибутами класса: это не дескрипторы данных, поэтому чтение
+    и запись идут в __dict__. Пустые слоты базового класса остаются (8 байт на слот).
+    """
+    slots = {name for klass in cls.__mro__ for name in getattr(klass, "__slots__", ())}
+    return type(cls.__name__, (cls,), dict.fromkeys(slots))
+
+
+# Классы со __slots__ и модули, которые создают их экземпляры при add_patient/add_appointment
+SLOTTED_CLASSES = (
+    (database, "Patient"), (database, "Appointment"), (database, "DateNew"),
+    (avl_tree, "AVLNode"), (avl_tree, "IndexChain"), (bplus_tree, "IndexChain"), (hash_index, "IndexChain"),
+    (bplus_tree, "BPlusEntry"), (bplus_tree, "BPlusLeaf"), (bplus_tree, "BPlusInternal"),
+    (hash_table, "Item"),
+)
+
+
+@contextlib.contextmanager
+def dict_backed_classes():
+    """На время блока подменяет классы SLOTTED_CLASSES их dict_backed-подклассами."""
+    replacements = {}
+    saved = []
+    for module, name in SLOTTED_CLASSES:
+        cls = getattr(module, name)
+        if cls not in replacements:
+            replacements[cls] = dict_backed(cls)
+        saved.append((module, name, cls))
+        setattr(module, name, replacements[cls])
+    try:
+        yield
+    finally:
+        for module, name, cls in saved:
+            setattr(module, name, cls)
+
+
+def bench_db_memory(patients: int, appointments_per_patient: int, index_type: str = "avl",
+                    slots: bool = True, seed: int = 0) -> dict:
+    """Байт на пациента и на приём (запись + все индексы) под tracemalloc.
+
+    Массивы записей растут страницами по мере добавления, поэтому их ячейки
+    (8 байт на запись с точностью до страницы) тоже учитываются.
+    slots=False - замер "до": записи и узлы индексов хранят поля в __dict__
+    (см. dict_backed_classes).
+    """
+    patient_rows, appointment_rows = synthetic_records(patients, appointments_per_patient, seed)
+    layout = contextlib.nullcontext() if slots else dict_backed_classes()
+    with layout:
+        db = RelationalDatabase(index_type=index_type)
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for row in patient_rows:
+                db.add_patient(*row)
+            patient_bytes, _ = tracemalloc.get_traced_memory()
+            for row in appointment_rows:
+                db.add_appointment(*row)
+        total_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "index": index_type,
+        "layout": "slots" if slots else "dict",
+        "patients": db.first_empty_patient,
+        "appointments": db.first_empty_appointment,
+        "bytes_per_patient": patient_bytes / db.first_empty_patient,
+        "bytes_per_appointment": (total_bytes - patient_bytes) / db.first_empty_appointment,
+        "total_bytes": total_bytes,
+    }
+
+
+def print_db_memory(rows: List[dict]) -> None:
+    print(f"{'index':<8}{'layout':<8}{'patients':>10}{'appointments':>14}{'B/patient':>11}{'B/appointment':>15}"
+          f"{'MiB':>8}")
+    for r in rows:
+        print(f"{r['index']:<8}{r['layout']:<8}{r['patients']:>10}{r['appointments']:>14}{r['bytes_per_patient']:>11.0f}"
+              f"{r['bytes_per_appointment']:>15.0f}{r['total_bytes'] / 2 ** 20:>8.1f}")
+
+
+# --- Загрузка файлов ---
+def bench_ingest(patients: int, appointments_per_patient: int, batch_size: int, workers: int = 1,
+                 seed: int = 0) -> dict:
+    """Загрузка синтетических файлов load_patients/load_appointments в пустую БД: итоги LoadSummary."""
+    patient_rows, appointment_rows = synthetic_records(patients, appointments_per_patient, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        patients_path = os.path.join(tmp, "patients.txt")
+        appointments_path = os.path.join(tmp, "appointments.txt")
+        with open(patients_path, "w", encoding="utf-8") as f:
+            f.writelines(format_fields(row) + "\n" for row in patient_rows)
+        with open(appointments_path, "w", encoding="utf-8") as f:
+            f.writelines(format_fields(row) + "\n" for row in appointment_rows)
+        db = RelationalDatabase()
+        with contextlib.redirect_stdout(io.StringIO()):
+            patient_summary = db.load_patients(patients_path, batch_size, workers)
+            appointment_summary = db.load_appointments(appointments_path, batch_size, workers)
+    return {"batch_size": batch_size, "workers": workers, "patients": patient_summary, "appointments": appointment_summary}
+
+
+def print_ingest(rows: List[dict]) -> None:
+    print(f"{'batch':>7}{'workers':>9}  {'file':<13}{'accepted':>10}{'rejected':>10}{'seconds':>9}{'rows/s':>10}")
+    for r in rows:
+        for name in ("patients", "appointments"):
+            summary = r[name]
+            print(f"{r['batch_size']:>7}{r['workers']:>9}  {name:<13}{summary.accepted:>10}{summary.rejected:>10}"
+                  f"{summary.seconds:>9.2f}{summary.rows_per_sec:>10.0f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Memory and speed benchmarks for the data structures.")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    hash_memory = commands.add_parser("hash-memory", help="HashTable memory: Item objects vs compact arrays")
+    hash_memory.add_argument("--size", type=int, default=100000, help="number of keys to insert")
+    hash_memory.add_argument("--seed", type=int, default=0)
+
+    hash_churn = commands.add_parser("hash-churn", help="find_patient_steps after add/delete churn")
+    hash_churn.add_argument("--size", type=int, default=5000, help="number of live patients")
+    hash_churn.add_argument("--rounds", type=int, default=20000, help="delete+add pairs")
+    hash_churn.add_argument("--seed", type=int, default=0)
+
+    avl = commands.add_parser("avl", help="AVLTree: iterative engine vs the previous recursive one")
+    avl.add_argument("--size", type=int, default=100000, help="number of keys (try 1000000)")
+    avl.add_argument("--keys", action="append", choices=["int", "str", "date"],
+                     help="key type (repeatable; default: all)")
+    avl.add_argument("--seed", type=int, default=0)
+
+    ordered_index = commands.add_parser("ordered-index", help="AVLTree vs BPlusTree: speed, range scans, memory")
+    ordered_index.add_argument("--size", type=int, default=100000, help="number of keys")
+    ordered_index.add_argument("--keys", action="append", choices=["int", "str", "date"],
+                               help="key type (repeatable; default: all)")
+    ordered_index.add_argument("--range-queries", type=int, default=1000,
+                               help="range scans, each over ~0.1%% of the keys")
+    ordered_index.add_argument("--seed", type=int, default=0)
+
+    db_memory = commands.add_parser("db-memory", help="RelationalDatabase bytes per patient and per appointment")
+    db_memory.add_argument("--patients", type=int, default=10000)
+    db_memory.add_argument("--per-patient", type=int, default=5, help="appointments per patient")
+    db_memory.add_argument("--index", action="append", choices=["avl", "bplus"],
+                           help="appointment index type (repeatable; default: avl)")
+    db_memory.add_argument("--seed", type=int, default=0)
+
+    ingest = commands.add_parser("ingest", help="load_patients/load_appointments throughput on synthetic files")
+    ingest.add_argument("--patients", type=int, default=20000)
+    ingest.add_argument("--per-patient", type=int, default=5, help="appointments per patient")
+    ingest.add_argument("--batch-size", type=int, action="append",
+                        help="rows per pipeline batch (repeatable; default: 4096)")
+    ingest.add_argument("--workers", type=int, action="append",
+                        help="parsing processes, 1 = serial (repeatable; default: 1)")
+    ingest.add_argument("--seed", type=int, default=0)
+
+    args = arg_parser.parse_args(argv)
+    if args.command == "hash-memory":
+        print(f"HashTable with {args.size} keys (tracemalloc, mix64 hash, resizable)")
+        print_hash_memory(bench_hash_memory(args.size, args.seed))
+    elif args.command == "hash-churn":
+        print(f"{args.size} patients, {args.rounds} delete+add rounds (static table, load 70%)")
+        print_hash_churn(bench_hash_churn(args.size, args.rounds, args.seed))
+    elif args.command == "avl":
+        print(f"AVLTree with {args.size} keys: insert all, find all, delete all")
+        print_avl(bench_avl(args.size, args.keys or ["int", "str", "date"], args.seed))
+    elif args.command == "ordered-index":
+        print(f"Ordered index with {args.size} keys, {args.range_queries} range scans")
+        print_ordered_index(bench_ordered_index(args.size, args.keys or ["int", "str", "date"],
+                                                args.range_queries, args.seed))
+    elif args.command == "db-memory":
+        print(f"Synthetic DB: {args.patients} patients x {args.per_patient} appointments (tracemalloc); "
+              f"layout dict = before __slots__, slots = after")
+        print_db_memory([bench_db_memory(args.patients, args.per_patient, index_type, slots, args.seed)
+                         for index_type in args.index or ["avl"] for slots in (False, True)])
+    elif args.command == "ingest":
+        print(f"Synthetic files: {args.patients} patients x {args.per_patient} appointments")
+        print_ingest([bench_ingest(args.patients, args.per_patient, batch_size, workers, args.seed)
+                      for batch_size in args.batch_size or [4096] for workers in args.workers or [1]])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+# bplus_tree.py - B+-дерево: упорядоченный индекс с интерфейсом AVLTree
+#
+# Ключи лежат в листах отсортированными списками (bisect вместо спуска по указателям
+# через каждый узел), листья связаны в двусвязный список для обхода и диапазонов.
+# Узлы при недозаполнении не сливаются - пустые удаляются целиком (как во многих СУБД).
+
+from bisect import bisect_left, bisect_right
+from typing import Optional, Iterator, Generic, TypeVar
+
+from avl_tree import IndexChain
+
+T = TypeVar('T')
+
+
+class BPlusEntry(Generic[T]):
+    """Ключ с цепочкой индексов - то, что find/итерация возвращают вместо узла AVL."""
+    __slots__ = ("key", "values")
+
+    def __init__(self, key: T, value: int) -> None:
+        self.key: T = key
+        self.values: IndexChain = IndexChain()
+        self.values.append(value)
+
+
+class BPlusLeaf:
+    __slots__ = ("keys", "entries", "prev", "next")
+
+    def __init__(self) -> None:
+        self.keys: list = []      # отсортированные ключи (для bisect)
+        self.entries: list = []   # записи BPlusEntry в том же порядке
+        self.prev: Optional[BPlusLeaf] = None
+        self.next: Optional[BPlusLeaf] = None
+
+
+class BPlusInternal:
+    __slots__ = ("keys", "children")
+
+    def __init__(self, keys: list, children: list) -> None:
+        # В children[i] лежат ключи из [keys[i - 1], keys[i])
+        self.keys: list = keys
+        self.children: list = children
+
+
+class BPlusCursor(Generic[T]):
+    """Курсор по записям BPlusTree с интерфейсом AVLCursor: позиция - (лист, номер ключа),
+    шаги идут по связанному списку листьев. Как и AVLCursor, за краем курсор стоит у
+    крайней записи, и шаг обратно её возвращает."""
+    __slots__ = ("_tree", "_leaf", "_i", "_edge")
+
+    def __init__(self, tree: 'BPlusTree[T]') -> None:
+        self._tree = tree
+        self._leaf: Optional[BPlusLeaf] = None
+        self._i: int = 0
+        # 0 - на записи; 1 - за концом, -1 - перед началом (позиция - крайняя запись)
+        self._edge: int = 0
+
+    @property
+    def current(self) -> Optional[BPlusEntry[T]]:
+        return self._leaf.entries[self._i] if self._leaf is not None and not self._edge else None
+
+    def first(self) -> Optional[BPlusEntry[T]]:
+        self._leaf = self._tree._leftmost_leaf()
+        self._i = 0
+        self._edge = 0
+        return self.current
+
+    def last(self) -> Optional[BPlusEntry[T]]:
+        node = self._tree.root
+        for _ in range(self._tree.height - 1):
+            node = node.children[-1]
+        self._leaf = node
+        self._i = len(node.keys) - 1 if node is not None else 0
+        self._edge = 0
+        return self.current
+
+    def seek(self, key: T) -> Optional[BPlusEntry[T]]:
+        """Встаёт на первую запись с ключом >= key (None - таких нет: курсор за концом)."""
+        self._edge = 0
+        if self._tree.root is None:
+            self._leaf = None
+            return None
+        leaf, _ = self._tree._descend(key)
+        i = bisect_left(leaf.keys, key)
+        if i == len(leaf.keys):
+            if leaf.next is None:
+                # Все ключи меньше key: за концом, у последней записи
+                self._leaf, self._i, self._edge = leaf, i - 1, 1
+                return None
+            leaf, i = leaf.next, 0
+        self._leaf, self._i = leaf, i
+        return self.current
+
+    def next(self) -> Optional[BPlusEntry[T]]:
+        if self._leaf is None:
+            return None
+        if self._edge:
+            # За краем: шаг обратно (от начала) возвращает первую запись, шаг дальше - None
+            if self._edge < 0:
+                self._edge = 0
+            return self.current
+        if self._i + 1 < len(self._leaf.keys):
+            self._i += 1
+        elif self._leaf.next is not None:
+            # Пустых листьев не бывает - следующий лист начинается с ключа
+            self._leaf, self._i = self._leaf.next, 0
+        else:
+            self._edge = 1
+        return self.current
+
+    def prev(self) -> Optional[BPlusEntry[T]]:
+        if self._leaf is None:
+            return None
+        if self._edge:
+            if self._edge > 0:
+                self._edge = 0
+            return self.current
+        if self._i > 0:
+            self._i -= 1
+        elif self._leaf.prev is not None:
+            self._leaf = self._leaf.prev
+            self._i = len(self._leaf.keys) - 1
+        else:
+            self._edge = -1
+        return self.current
+
+    def __iter__(self) -> Iterator[BPlusEntry[T]]:
+        # Записи от текущей вперёд; после break курсор стоит на первой невыданной
+        entry = self.current
+        while entry is not None:
+            self.next()
+            yield entry
+            entry = self.current
+
+
+class BPlusTree(Generic[T]):
+    DEFAULT_ORDER: int = 64
+
+    def __init__(self, order: int = DEFAULT_ORDER) -> None:
+        if order < 3:
+            raise ValueError("order must be at least 3")
+        # Наибольшее число ключей в узле; при превышении узел делится пополам
+        self.order: int = order
+        self.root = None
+        self._size: int = 0
+        # Число уровней: 0 - дерево пусто, 1 - корень-лист
+        self._height: int = 0
+        # Обратный индекс значение -> ключ (как у AVLTree)
+        self._key_by_value: dict = {}
+
+    def __len__(self) -> int:
+        # Число различных ключей
+        return self._size
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    def _descend(self, key: T) -> tuple:
+        # Спуск к листу, где лежит (или должен лежать) key: (лист, путь [(узел, номер ребёнка)])
+        node = self.root
+        path = []
+        for _ in range(self._height - 1):
+            i = bisect_right(node.keys, key)
+            path.append((node, i))
+            node = node.children[i]
+        return node, path
+
+    def _leftmost_leaf(self) -> Optional[BPlusLeaf]:
+        node = self.root
+        for _ in range(self._height - 1):
+            node = node.children[0]
+        return node
+
+    # --- Вставка ---
+    def _claim(self, key: T, value: int) -> None:
+        # Значение может лежать только под одним ключом
+        if value in self._key_by_value:
+            raise ValueError(f"Value {value!r} is already indexed under key {self._key_by_value[value]!r}")
+        self._key_by_value[value] = key
+
+    def insert(self, key: T, value: int) -> BPlusEntry[T]:
+        if value in self._key_by_value and self._key_by_value[value] == key:
+            # Значение уже в цепочке этого ключа
+            return self.find(key)
+        self._claim(key, value)
+        if self.root is None:
+            leaf = BPlusLeaf()
+            entry = BPlusEntry(key, value)
+            leaf.keys.append(key)
+            leaf.entries.append(entry)
+            self.root = leaf
+            self._height = 1
+            self._size = 1
+            return entry
+
+        leaf, path = self._descend(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            # Ключ уже существует -> добавляем значение в цепочку
+            entry = leaf.entries[i]
+            entry.values.append(value)
+            return entry
+
+        entry = BPlusEntry(key, value)
+        leaf.keys.insert(i, key)
+        leaf.entries.insert(i, entry)
+        self._size += 1
+        if len(leaf.keys) > self.order:
+            self._split_leaf(leaf, path)
+        return entry
+
+    def _split_leaf(self, leaf: BPlusLeaf, path: list) -> None:
+        mid = len(leaf.keys) // 2
+        right = BPlusLeaf()
+        right.keys = leaf.keys[mid:]
+        right.entries = leaf.entries[mid:]
+        del leaf.keys[mid:]
+        del leaf.entries[mid:]
+        right.next = leaf.next
+        if right.next is not None:
+            right.next.prev = right
+        right.prev = leaf
+        leaf.next = right
+        self._insert_into_parent(path, right.keys[0], right)
+
+    def _insert_into_parent(self, path: list, separator: T, new_node) -> None:
+        # new_node - правый сосед только что разделённого узла; поднимаемся, пока узлы переполнены
+        while path:
+            parent, i = path.pop()
+            parent.keys.insert(i, separator)
+            parent.children.insert(i + 1, new_node)
+            if len(parent.keys) <= self.order:
+                return
+            mid = len(parent.keys) // 2
+            separator = parent.keys[mid]
+            new_node = BPlusInternal(parent.keys[mid + 1:], parent.children[mid + 1:])
+            del parent.keys[mid:]
+            del parent.children[mid + 1:]
+        # Разделился корень - дерево растёт на уровень
+        self.root = BPlusInternal([separator], [self.root, new_node])
+        self._height += 1
+
+    def bulk_load(self, pairs) -> None:
+        """Строит пустое дерево сразу из пар (ключ, значение): сортировка, склейка равных
+        ключей в цепочки, заполненные листья и уровни разделителей над ними за O(n)."""
+        if self.root is not None:
+            raise ValueError("bulk_load requires an empty tree")
+        entries = []
+        for key, value in sorted(pairs, key=lambda pair: pair[0]):
+            if entries and entries[-1].key == key:
+                if value not in entries[-1].values:
+                    self._claim(key, value)
+                    entries[-1].values.append(value)
+            else:
+                self._claim(key, value)
+                entries.append(BPlusEntry(key, value))
+        if not entries:
+            return
+
+        level = []
+        previous = None
+        for start in range(0, len(entries), self.order):
+            leaf = BPlusLeaf()
+            leaf.entries = entries[start:start + self.order]
+            leaf.keys = [entry.key for entry in leaf.entries]
+            leaf.prev = previous
+            if previous is not None:
+                previous.next = leaf
+            previous = leaf
+            level.append((leaf, leaf.keys[0]))
+        height = 1
+        while len(level) > 1:
+            upper = []
+            for start in range(0, len(level), self.order + 1):
+                group = level[start:start + self.order + 1]
+                node = BPlusInternal([low for _, low in group[1:]], [child for child, _ in group])
+                upper.append((node, group[0][1]))
+            level = upper
+            height += 1
+        self.root = level[0][0]
+        self._height = height
+        self._size = len(entries)
+
+    def cursor(self, key: Optional[T] = None) -> BPlusCursor[T]:
+        # Курсор на первом ключе >= key (без key - на наименьшем)
+        cursor = BPlusCursor(self)
+        if key is None:
+            cursor.first()
+        else:
+            cursor.seek(key)
+        return cursor
+
+    # --- Поиск ---
+    def find(self, key: T) -> Optional[BPlusEntry[T]]:
+        if self.root is None:
+            return None
+        leaf, _ = self._descend(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            return leaf.entries[i]
+        return None
+
+    def get(self, key: T) -> Optional[IndexChain]:
+        # Быстрый поиск: цепочка индексов по ключу или None
+        entry = self.find(key)
+        return entry.values if entry is not None else None
+
+    def find_steps(self, key: T) -> tuple:
+        # Инструментированный поиск: (запись или None, количество просмотренных узлов)
+        if self.root is None:
+            return None, 0
+        return self.find(key), self._height
+
+    def __iter__(self) -> Iterator[BPlusEntry[T]]:
+        leaf = self._leftmost_leaf()
+        while leaf is not None:
+            yield from leaf.entries
+            leaf = leaf.next
+
+    def range(self, lo: Optional[T] = None, hi: Optional[T] = None) -> Iterator[BPlusEntry[T]]:
+        """Записи с lo <= key <= hi по возрастанию ключа (None - граница не задана).
+
+        Один спуск к lo, дальше - последовательный проход по связанным листьям.
+        """
+        if self.root is None:
+            return
+        if lo is None:
+            leaf, i = self._leftmost_leaf(), 0
+        else:
+            leaf, _ = self._descend(lo)
+            i = bisect_left(leaf.keys, lo)
+        while leaf is not None:
+            keys = leaf.keys
+            for j in range(i, len(keys)):
+                if hi is not None and hi < keys[j]:
+                    return
+                yield leaf.entries[j]
+            leaf, i = leaf.next, 0
+
+    # --- Удаление ---
+    def delete_node(self, key: T) -> Optional[BPlusEntry[T]]:
+        if self.root is None:
+            return None
+        leaf, path = self._descend(key)
+        i = bisect_left(leaf.keys, key)
+        if i >= len(leaf.keys) or leaf.keys[i] != key:
+            return None
+        del leaf.keys[i]
+        entry = leaf.entries.pop(i)
+        for value in entry.values:
+            del self._key_by_value[value]
+        self._size -= 1
+        # Разделители в предках не трогаем: они по-прежнему правильно делят ключи
+        if not leaf.keys:
+            self._remove_empty_leaf(leaf, path)
+        return entry
+
+    def _remove_empty_leaf(self, leaf: BPlusLeaf, path: list) -> None:
+        if leaf.prev is not None:
+            leaf.prev.next = leaf.next
+        if leaf.next is not None:
+            leaf.next.prev = leaf.prev
+        while path:
+            parent, i = path.pop()
+            del parent.children[i]
+            # Диапазон удалённого ребёнка отходит соседу вместе с разделителем
+            if parent.keys:
+                del parent.keys[i - 1 if i > 0 else 0]
+            if parent.children:
+                break
+        else:
+            # Удалён последний лист
+            self.root = None
+            self._height = 0
+            return
+        # Корень с единственным ребёнком больше не нужен
+        while self._height > 1 and len(self.root.children) == 1:
+            self.root = self.root.children[0]
+            self._height -= 1
+
+    def delete_value(self, key: T, value: int) -> bool:
+        entry = self.find(key)
+        if entry is None:
+            return False
+        if value not in entry.values:
+            return False
+        if len(entry.values) == 1:
+            self.delete_node(key)
+        else:
+            entry.values.remove(value)
+            del self._key_by_value[value]
+        return True
+
+    def key_of(self, value: int) -> Optional[T]:
+        return self._key_by_value.get(value)
+
+    def delete_by_value_only(self, value: int) -> bool:
+        if value not in self._key_by_value:
+            return False
+        return self.delete_value(self._key_by_value[value], value)
+
+    def move_value(self, old_value: int, new_value: int) -> bool:
+        # Перенос значения под тем же ключом; см. AVLTree.move_value
+        if old_value not in self._key_by_value:
+            return False
+        key = self._key_by_value[old_value]
+        self._claim(key, new_value)
+        del self._key_by_value[old_value]
+        chain = self.find(key).values
+        chain.remove(old_value)
+        chain.append(new_value)
+        return True
+
+    def __repr__(self):
+        # Для отладки: листья по порядку, в каждом - ключи с цепочками индексов
+        lines = []
+        leaf = self._leftmost_leaf() if self.root is not None else None
+        number = 0
+        while leaf is not None:
+            chains = "; ".join(f"{entry.key} : {list(entry.values)}" for entry in leaf.entries)
+            lines.append(f"leaf {number}: {chains}")
+            leaf = leaf.next
+            number += 1
+        return "\n".join(lines)
+
+
+# --- Тестирование ---
+if __name__ == "__main__":
+    tree = BPlusTree[int](order=3)
+    for k in (10, 20, 30, 40, 50):
+        tree.insert(k, k)
+    # Курсор у краёв: шаг за край паркует его, шаг обратно возвращает крайний ключ
+    cursor = tree.cursor()
+    assert [entry.key for entry in cursor] == [10, 20, 30, 40, 50]
+    assert cursor.current is None and cursor.next() is None
+    assert cursor.prev().key == 50 and cursor.prev().key == 40
+    cursor.first()
+    assert cursor.prev() is None and cursor.prev() is None and cursor.next().key == 10
+    assert cursor.seek(60) is None and cursor.prev().key == 50
+    assert cursor.seek(35).key == 40 and cursor.prev().key == 30
+    empty_cursor = BPlusTree[int]().cursor()
+    assert empty_cursor.next() is None and empty_cursor.prev() is None
+    print("BPlusCursor edges: ok")
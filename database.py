@@ -1,52 +1,155 @@
-import ctypes
+import copy
+from typing import Iterator, Optional
 from Patient import Patient
-from Appointment import Appointment
+from Appointment import Appointment, appointment_key
 from DateNew import DateNew
 from hash_table import HashTable
 from avl_tree import AVLTree
+from hash_index import HashIndex
+from bplus_tree import BPlusTree
 from List import MyList
-from massive import patients_to_array, appointments_to_array
+from paged_array import PagedArray
+from massive import patients_to_array, appointments_to_array, LoadSummary, DEFAULT_BATCH_SIZE
+from parser import format_fields
 
 
-MAX_SIZE = 1000
-PatientArrayType = ctypes.py_object * MAX_SIZE
-AppointmentArrayType = ctypes.py_object * MAX_SIZE
+# Предел числа пациентов и приёмов; None - массивы растут без ограничения
+MAX_SIZE = None
+
+# Упорядоченные индексы приёмов (по OMS и по дате): AVL-дерево или B+-дерево
+INDEX_TYPES = {
+    "avl": AVLTree,
+    "bplus": BPlusTree,
+}
+
+# Порядки обхода приёмов (iter_appointments) -> индекс, по ключу которого идёт обход
+APPOINTMENT_ORDERS = {
+    "oms": "appointment_tree",
+    "date": "appointment_date_tree",
+    "doctor": "appointment_doctor_tree",
+}
+
+# Порядки строк отчёта (generate_report, sort_by) -> ключ сортировки по (пациент, приём)
+REPORT_SORT_KEYS = {
+    "oms": lambda patient, appointment: patient.oms_policy,
+    "name": lambda patient, appointment: patient.full_name,
+    "doctor": lambda patient, appointment: appointment.doctor,
+    "date": lambda patient, appointment: appointment.appointment_date,
+}
 
 
 class RelationalDatabase:
-    def __init__(self):
-        # Массивы для хранения объектов
-        self.patient_arr = PatientArrayType()
-        self.appointment_arr = AppointmentArrayType()
-        for i in range(MAX_SIZE):
-            self.patient_arr[i] = None
-            self.appointment_arr[i] = None
+    def __init__(self, max_size: Optional[int] = MAX_SIZE, patient_ht: HashTable = None, instrumented: bool = False,
+                 index_type: str = "avl"):
+        if index_type not in INDEX_TYPES:
+            valid = ", ".join(INDEX_TYPES)
+            raise ValueError(f"Unknown index type {index_type!r}. Valid: {valid}")
+        index_class = INDEX_TYPES[index_type]
+
+        # Массивы для хранения объектов: растут страницами до max_size (None - без предела)
+        self.max_size = max_size
+        self.patient_arr = PagedArray(max_size)
+        self.appointment_arr = PagedArray(max_size)
 
         # Структуры данных для ускорения поиска
-        # Хеш-таблица для пациентов по OMS Policy (ключ - int)
-        self.patient_ht = HashTable()
-        # AVL-дерево для приёмов по OMS Policy пациента (ключ - int)
-        self.appointment_tree = AVLTree[int]()
-        # AVL-дерево для приёмов по дате приёма (ключ - DateNew)
-        self.appointment_date_tree = AVLTree[DateNew]()
+        # Хеш-таблица для пациентов по OMS Policy (ключ - int);
+        # растущая, чтобы реестр не упирался в 1000 ячеек; ячейки в компактных массивах,
+        # Robin Hood держит длины проб ровными при постоянных добавлениях/удалениях
+        if patient_ht is None:
+            patient_ht = HashTable(resizable=True, storage="compact", robin_hood=True)
+        self.patient_ht = patient_ht
+        # Хеш-индекс пациентов по ФИО (ключ - str), цепочка - индексы в patient_arr:
+        # фильтр по имени - O(1 + совпадения), порядок ключей ему не нужен
+        self.patient_name_index = HashIndex[str]()
+        # Индекс приёмов по OMS Policy пациента (ключ - int); AVL или B+ - по index_type
+        self.appointment_tree = index_class[int]()
+        # Индекс приёмов по дате приёма (ключ - DateNew)
+        self.appointment_date_tree = index_class[DateNew]()
+        # AVL-дерево для приёмов по врачу (ключ - str)
+        self.appointment_doctor_tree = AVLTree[str]()
+        # ХТ точного совпадения приёма: составной ключ (oms, диагноз, врач, дата) -> индекс
+        # в appointment_arr. Ключи длиннее 64 бит, поэтому ячейки - объекты Item
+        self.appointment_key_ht = HashTable(resizable=True, hash_strategy="mix64", robin_hood=True)
+
+        # Подсчёт шагов поиска для отображения (GUI). Без него методы *_steps
+        # идут быстрым путём и возвращают шаги = None
+        self.instrumented = instrumented
 
         # Счётчики первых пустых ячеек в массивах
         self.first_empty_patient = 0
         self.first_empty_appointment = 0
+        # Итог последней загрузки файла (load_patients/load_appointments)
+        self.last_load_summary: LoadSummary = None
 
-    # --- Загрузка из файлов ---
-    def load_patients(self, filename: str):
-        self.first_empty_patient = patients_to_array(filename, self.patient_ht, self.patient_arr, self.first_empty_patient)
+        # Массивы и ХТ общие со снимком (см. snapshot) - копируются перед первой записью
+        self._shared = False
+
+    # --- Снимки ---
+    def snapshot(self) -> "RelationalDatabase":
+        """Согласованный снимок базы для долгих чтений (отчёты) за O(1) по деревьям.
+
+        Снимок - обычный RelationalDatabase, который видит состояние на момент вызова:
+        AVL-индексы делят узлы с базой и копируют пути при записи (O(log n) узлов на
+        операцию), а массивы, хеш-таблицы и индекс ФИО страничные: первая запись после снимка
+        копирует списки страниц (O(n / размер страницы)), а каждая запись - только
+        страницы, которые меняет. Записи в базу не ждут читателей снимка и не видны им.
+        """
+        trees = ("appointment_tree", "appointment_date_tree", "appointment_doctor_tree")
+        if not all(isinstance(getattr(self, name), AVLTree) for name in trees):
+            raise ValueError("Snapshots require AVL indexes (index_type='avl')")
+        # Незаконченный перенос менял бы общие ячейки ХТ при поиске
+        self.patient_ht.finish_migration()
+        self.appointment_key_ht.finish_migration()
+        snap = copy.copy(self)
+        for name in trees:
+            setattr(snap, name, getattr(self, name).snapshot())
+        snap.patient_name_index = self.patient_name_index.snapshot()
+        self._shared = snap._shared = True
+        return snap
+
+    def _unshare(self) -> None:
+        # Вызывается в начале каждой записи: отделяет массивы и ХТ от снимка (страницы
+        # остаются общими, пока одна из сторон не запишет в них)
+        if not self._shared:
+            return
+        self.patient_arr = self.patient_arr.copy()
+        self.appointment_arr = self.appointment_arr.copy()
+        self.patient_ht = self.patient_ht.copy()
+        self.appointment_key_ht = self.appointment_key_ht.copy()
+        self._shared = False
 
-    def load_appointments(self, filename: str):
+    # --- Загрузка из файлов ---
+    def load_patients(self, filename: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                      workers: int = 1) -> LoadSummary:
+        self._unshare()
+        summary = LoadSummary(filename)
+        self.first_empty_patient = patients_to_array(
+            filename, self.patient_ht, self.patient_arr, self.first_empty_patient, self.patient_name_index,
+            batch_size=batch_size, summary=summary, workers=workers
+        )
+        self.last_load_summary = summary
+        return summary
+
+    def load_appointments(self, filename: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                          workers: int = 1) -> LoadSummary:
+        self._unshare()
+        summary = LoadSummary(filename)
+        # Деревья приёмов ещё пусты - собираем их пакетно после чтения файла
+        bulk_build = (len(self.appointment_tree) == 0 and len(self.appointment_date_tree) == 0
+                      and len(self.appointment_doctor_tree) == 0)
         self.first_empty_appointment = appointments_to_array(
             filename, self.appointment_tree, self.patient_ht, self.appointment_arr,
-            self.first_empty_appointment, self.appointment_date_tree
+            self.first_empty_appointment, self.appointment_date_tree, self.appointment_doctor_tree,
+            self.appointment_key_ht, bulk_build=bulk_build, batch_size=batch_size, summary=summary,
+            workers=workers
         )
+        self.last_load_summary = summary
+        return summary
 
     # --- Добавление ---
     def add_patient(self, oms_policy: int, full_name: str, birth_date_str: str) -> bool:
-        if self.first_empty_patient >= MAX_SIZE:
+        self._unshare()
+        if self.patient_arr.full(self.first_empty_patient):
             print("Maximum size of patient array has been reached")
             return False
 
@@ -62,17 +165,19 @@ class RelationalDatabase:
             print(f"Patient with OMS Policy {oms_policy} already exists.")
             return False
 
+        self.patient_name_index.insert(patient.full_name, self.first_empty_patient)
         self.patient_arr[self.first_empty_patient] = patient
         self.first_empty_patient += 1
         return True
 
     def add_appointment(self, oms_policy: int, diagnosis: str, doctor: str, appointment_date_str: str) -> bool:
-        if self.first_empty_appointment >= MAX_SIZE:
+        self._unshare()
+        if self.appointment_arr.full(self.first_empty_appointment):
             print("Maximum size of appointment array has been reached")
             return False
 
     # Проверка существования пациента
-        if self.patient_ht.search(oms_policy)[0] is None:
+        if oms_policy not in self.patient_ht:
             print(f"Cannot add appointment: Patient with OMS Policy {oms_policy} does not exist.")
             return False
 
@@ -83,22 +188,17 @@ class RelationalDatabase:
             print(f"Failed to add appointment: {e}")
             return False
 
-    # ✅ ПРОВЕРКА НА ДУБЛИКАТ ПРИЁМА
-        node = self.appointment_tree.find(oms_policy)
-        if node:
-            for idx in node.values:
-                existing_app = self.appointment_arr[idx]
-                if (existing_app and
-                    existing_app.oms_policy == oms_policy and
-                    existing_app.diagnosis == diagnosis and
-                    existing_app.doctor == doctor and
-                    existing_app.appointment_date == appointment_date):
-                    print(f"Appointment already exists: OMS={oms_policy}, Diagnosis='{diagnosis}', Doctor='{doctor}', Date={appointment_date}")
-                    return False
+    # ✅ ПРОВЕРКА НА ДУБЛИКАТ ПРИЁМА (по составному ключу в ХТ)
+        key = appointment.key()
+        if key in self.appointment_key_ht:
+            print(f"Appointment already exists: OMS={oms_policy}, Diagnosis='{diagnosis}', Doctor='{doctor}', Date={appointment_date}")
+            return False
 
     # Добавление в структуры данных
+        self.appointment_key_ht.insert(key, self.first_empty_appointment)
         self.appointment_tree.insert(appointment.oms_policy, self.first_empty_appointment)
         self.appointment_date_tree.insert(appointment.appointment_date, self.first_empty_appointment)
+        self.appointment_doctor_tree.insert(appointment.doctor, self.first_empty_appointment)
 
         self.appointment_arr[self.first_empty_appointment] = appointment
         self.first_empty_appointment += 1
@@ -106,16 +206,16 @@ class RelationalDatabase:
 
     # --- Удаление ---
     def delete_patient(self, oms_policy: int) -> bool:
-        search_result = self.patient_ht.search(oms_policy)
-        item = search_result[0]
-        if item is None:
+        self._unshare()
+        patient_index = self.patient_ht.get(oms_policy)
+        if patient_index is None:
             print(f"Patient with OMS Policy {oms_policy} not found.")
             return False
 
-        patient_index = item.value
         patient_to_delete = self.patient_arr[patient_index]
 
         self.patient_ht.delete(oms_policy)
+        self.patient_name_index.delete_by_value_only(patient_index)
 
         self.first_empty_patient -= 1
         moved_patient = self.patient_arr[self.first_empty_patient]
@@ -124,13 +224,19 @@ class RelationalDatabase:
         if patient_index != self.first_empty_patient:
             self.patient_arr[patient_index] = moved_patient
             if moved_patient is not None:
+                # Последний пациент переехал в освободившуюся ячейку - переписываем его индекс
+                # в ХТ (insert существующего ключа не обновил бы значение) и в индексе ФИО
+                self.patient_ht.delete(moved_patient.oms_policy)
                 self.patient_ht.insert(moved_patient.oms_policy, patient_index)
+                self.patient_name_index.move_value(self.first_empty_patient, patient_index)
         else:
             self.patient_arr[patient_index] = None
 
         node = self.appointment_tree.find(oms_policy)
         if node:
-            indices_to_remove = list(node.values)
+            # Удаляем с конца: на место удаляемого приёма переезжает последний, и при
+            # обходе по убыванию это никогда не оказывается ещё не удалённый приём пациента
+            indices_to_remove = sorted(node.values, reverse=True)
             for app_index in indices_to_remove:
                 self._remove_appointment_index(app_index)
             self.appointment_tree.delete_node(oms_policy)
@@ -138,65 +244,119 @@ class RelationalDatabase:
         print(f"Patient with OMS Policy {oms_policy} and associated appointments deleted.")
         return True
 
+    def _appointment_trees(self) -> tuple:
+        return self.appointment_tree, self.appointment_date_tree, self.appointment_doctor_tree
+
     def _remove_appointment_index(self, index: int):
+        """Удаляет приём index из массива и всех индексов; последний приём переезжает на его место."""
         if index >= self.first_empty_appointment or self.appointment_arr[index] is None:
             return
 
+        # Запоминаем удаляемый приём до того, как ячейка может быть очищена
+        app_to_remove = self.appointment_arr[index]
+        self.appointment_key_ht.delete(app_to_remove.key())
+        # Деревья находят ключ индекса сами, по обратному индексу
+        for tree in self._appointment_trees():
+            tree.delete_by_value_only(index)
+
         self.first_empty_appointment -= 1
         moved_appointment = self.appointment_arr[self.first_empty_appointment]
         self.appointment_arr[self.first_empty_appointment] = None
 
-        app_to_remove = self.appointment_arr[index]
-        if app_to_remove:
-            self.appointment_tree.delete_value(app_to_remove.oms_policy, index)
-            self.appointment_date_tree.delete_value(app_to_remove.appointment_date, index)
-
         if index != self.first_empty_appointment:
             self.appointment_arr[index] = moved_appointment
             if moved_appointment is not None:
-                self.appointment_tree.delete_value(moved_appointment.oms_policy, self.first_empty_appointment)
-                self.appointment_date_tree.delete_value(moved_appointment.appointment_date, self.first_empty_appointment)
-                self.appointment_tree.insert(moved_appointment.oms_policy, index)
-                self.appointment_date_tree.insert(moved_appointment.appointment_date, index)
+                moved_key = moved_appointment.key()
+                self.appointment_key_ht.delete(moved_key)
+                self.appointment_key_ht.insert(moved_key, index)
+                for tree in self._appointment_trees():
+                    tree.move_value(self.first_empty_appointment, index)
         else:
             self.appointment_arr[index] = None
 
     def delete_appointment(self, target_oms: int, target_diagnosis: str, target_doctor: str, target_date_str: str) -> bool:
+        self._unshare()
         try:
             target_date = DateNew(target_date_str)
         except (ValueError, TypeError) as e:
             print(f"Invalid date format for deletion: {e}")
             return False
 
-        node = self.appointment_tree.find(target_oms)
-        if not node:
+        if self.appointment_tree.find(target_oms) is None:
              print(f"No appointments found for OMS Policy {target_oms} to match for deletion.")
              return False
 
-        found_index = -1
-        for idx in node.values:
-            app = self.appointment_arr[idx]
-            if (app and
-                app.oms_policy == target_oms and
-                app.diagnosis == target_diagnosis and
-                app.doctor == target_doctor and
-                app.appointment_date == target_date):
-                found_index = idx
-                break
-
-        if found_index == -1:
+        found_index = self.appointment_key_ht.get(
+            appointment_key(target_oms, target_diagnosis, target_doctor, target_date))
+        if found_index is None:
             print("Appointment not found for deletion.")
             return False
 
-        self.appointment_tree.delete_value(target_oms, found_index)
-        self.appointment_date_tree.delete_value(target_date, found_index)
-
         self._remove_appointment_index(found_index)
         print(f"Appointment deleted.")
         return True
 
+    # --- Поиск (быстрый путь, без подсчёта шагов) ---
+    def find_patient(self, oms_policy: int) -> Patient:
+        """Пациент по OMS Policy или None."""
+        patient_index = self.patient_ht.get(oms_policy)
+        return self.patient_arr[patient_index] if patient_index is not None else None
+
+    def _appointments_at(self, indices) -> MyList[Appointment]:
+        appointments = MyList[Appointment]()
+        if indices is not None:
+            for idx in indices:
+                app = self.appointment_arr[idx]
+                if app:
+                    appointments.append(app)
+        return appointments
+
+    def find_appointments_by_oms(self, oms_policy: int) -> MyList[Appointment]:
+        """Приёмы пациента по OMS Policy."""
+        return self._appointments_at(self.appointment_tree.get(oms_policy))
+
+    def find_appointments_by_date(self, date: DateNew) -> MyList[Appointment]:
+        """Приёмы на дату."""
+        return self._appointments_at(self.appointment_date_tree.get(date))
+
+    def _appointment_indices_between(self, start: DateNew = None, end: DateNew = None) -> list:
+        # Индексы приёмов с start <= дата <= end: по возрастанию даты, внутри даты - индекса
+        indices = []
+        for node in self.appointment_date_tree.range(start, end):
+            indices.extend(sorted(node.values))
+        return indices
+
+    def find_appointments_between(self, start: DateNew = None, end: DateNew = None) -> MyList[Appointment]:
+        """Приёмы с датой в [start, end] (None - без границы), по возрастанию даты.
+
+        Обходит только узлы дерева дат внутри диапазона: O(log n + k).
+        """
+        # MyList.append добавляет в начало, поэтому идём с конца
+        appointments = (self.appointment_arr[idx] for idx in reversed(self._appointment_indices_between(start, end)))
+        return MyList[Appointment].from_iterable(app for app in appointments if app is not None)
+
+    def iter_appointments(self, order: str = "oms", start=None) -> Iterator[Appointment]:
+        """Приёмы по возрастанию ключа индекса order ("oms", "date", "doctor"), начиная
+        с первого ключа >= start (None - с начала); внутри ключа - по индексу в массиве.
+
+        Потоковый обход курсором индекса: O(log n) на старт и O(1) амортизированно на
+        ключ, без сбора всего результата. Генератор можно прервать и продолжить; записи
+        между шагами делают его недействительным - для долгих выгрузок обходят snapshot().
+        """
+        if order not in APPOINTMENT_ORDERS:
+            valid = ", ".join(APPOINTMENT_ORDERS)
+            raise ValueError(f"Unknown appointment order {order!r}. Valid: {valid}")
+        for node in getattr(self, APPOINTMENT_ORDERS[order]).cursor(start):
+            for idx in sorted(node.values):
+                appointment = self.appointment_arr[idx]
+                if appointment is not None:
+                    yield appointment
+
     # --- Поиск (возвращает количество шагов) ---
+    # Шаги считаются только при instrumented=True, иначе возвращается None
     def find_patient_steps(self, oms_policy: int) -> tuple:
+        if not self.instrumented:
+            return self.find_patient(oms_policy), None
         result = self.patient_ht.search(oms_policy)
         item = result[0]
         steps = result[1]
@@ -204,26 +364,10 @@ class RelationalDatabase:
         return patient, steps
 
     def find_appointments_by_oms_steps(self, oms_policy: int) -> tuple:
-        node = self.appointment_tree.root
-        steps = 0
-        found_node = None
-        while node:
-            steps += 1
-            if oms_policy < node.key:
-                node = node.left
-            elif oms_policy > node.key:
-                node = node.right
-            else:
-                found_node = node
-                break
-
-        appointments = MyList[Appointment]()
-        if found_node:
-            for idx in found_node.values:
-                app = self.appointment_arr[idx]
-                if app:
-                    appointments.append(app)
-        return appointments, steps
+        if not self.instrumented:
+            return self.find_appointments_by_oms(oms_policy), None
+        found_node, steps = self.appointment_tree.find_steps(oms_policy)
+        return self._appointments_at(found_node.values if found_node else None), steps
     
     def find_patient_by_all_fields_steps(self, oms_policy: int, full_name: str, birth_date_str:str) -> tuple:
         """
@@ -236,7 +380,7 @@ class RelationalDatabase:
         birth_date_str: Дата рождения в формате "ДД МММ ГГГГ"
     
     Returns:
-        tuple: (Patient или None, количество шагов поиска в ХТ)
+        tuple: (Patient или None, количество шагов поиска в ХТ или None без инструментирования)
     """
         try:
             birth_date = DateNew(birth_date_str)
@@ -245,15 +389,11 @@ class RelationalDatabase:
             return None, 0
 
         # Поиск в ХТ по OMS
-        result = self.patient_ht.search(oms_policy)
-        item = result[0]
-        steps = result[1]
+        patient, steps = self.find_patient_steps(oms_policy)
     
-        if item is None:
+        if patient is None:
             return None, steps
     
-        patient = self.patient_arr[item.value]
-    
         # Проверяем остальные поля
         if patient.full_name == full_name and patient.birth_date == birth_date:
             return patient, steps
@@ -272,7 +412,7 @@ class RelationalDatabase:
         date_str: Дата приёма в формате "ДД МММ ГГГГ"
     
     Returns:
-        tuple: (Appointment или None, количество шагов поиска в AVL-дереве)
+        tuple: (Appointment или None, количество шагов поиска в AVL-дереве или None без инструментирования)
         """
         try:
             target_date = DateNew(date_str)
@@ -281,24 +421,17 @@ class RelationalDatabase:
             return None, 0
 
         # Поиск в AVL по OMS
-        node = self.appointment_tree.root
-        steps = 0
-        found_node = None
-        while node:
-            steps += 1
-            if oms_policy < node.key:
-                node = node.left
-            elif oms_policy > node.key:
-                node = node.right
-            else:
-                found_node = node
-                break
-
-            if not found_node:
-                return None, steps
+        if self.instrumented:
+            found_node, steps = self.appointment_tree.find_steps(oms_policy)
+            indices = found_node.values if found_node else None
+        else:
+            indices, steps = self.appointment_tree.get(oms_policy), None
+
+        if indices is None:
+            return None, steps
 
         # Проверяем все приёмы с этим OMS на соответствие остальным полям
-        for idx in found_node.values:
+        for idx in indices:
             app = self.appointment_arr[idx]
             if (app and
                 app.diagnosis == diagnosis and
@@ -310,60 +443,96 @@ class RelationalDatabase:
 
     # --- Фильтрация (просмотр) ---
     def filter_patients_by_name(self, target_name: str) -> MyList[Patient]:
-        """Фильтр для Справочника_1.Поле_2 (Full Name)."""
+        """Фильтр для Справочника_1.Поле_2 (Full Name) по индексу ФИО."""
         result = MyList[Patient]()
-        for i in range(self.first_empty_patient):
+        indices = self.patient_name_index.get(target_name)
+        if indices is None:
+            return result
+        # Порядок - как при переборе массива (по возрастанию индекса)
+        for i in sorted(indices):
             patient = self.patient_arr[i]
-            if patient is not None and patient.full_name == target_name:
+            if patient is not None:
                 result.append(patient)
         return result
 
     def filter_appointments_by_doctor(self, target_doctor: str) -> MyList[Appointment]:
-        """Фильтр для Справочника_2.Поле_3 (Doctor) - ИСПРАВЛЕНО."""
+        """Фильтр для Справочника_2.Поле_3 (Doctor) по индексу врачей."""
         result = MyList[Appointment]()
-        for i in range(self.first_empty_appointment):
+        indices = self.appointment_doctor_tree.get(target_doctor)
+        if indices is None:
+            return result
+        # Порядок - как при переборе массива (по возрастанию индекса)
+        for i in sorted(indices):
             appointment = self.appointment_arr[i]
-            if appointment is not None and appointment.doctor == target_doctor:
+            if appointment is not None:
                 result.append(appointment)
         return result
 
     def find_appointments_by_date_steps(self, date: DateNew) -> tuple:
         """Поиск приёмов по дате с подсчётом количества шагов в AVL-дереве."""
-        node = self.appointment_date_tree.root
-        steps = 0
-        found_node = None
-        
-        while node:
-            steps += 1
-            if date < node.key:
-                node = node.left
-            elif date > node.key:
-                node = node.right
-            else:
-                found_node = node
-                break
-
-        appointments = MyList[Appointment]()
-        if found_node:
-            for idx in found_node.values:
-                app = self.appointment_arr[idx]
-                if app:
-                    appointments.append(app)
-        
-        return appointments, steps
+        if not self.instrumented:
+            return self.find_appointments_by_date(date), None
+        found_node, steps = self.appointment_date_tree.find_steps(date)
+        return self._appointments_at(found_node.values if found_node else None), steps
 
     # --- Формирование отчёта (связующая задача) ---
-    def generate_report(self, filter_name: str = "", filter_doctor: str = "", filter_date: DateNew = None) -> MyList[str]:
+    def _report_candidates(self, filter_name: str = "", filter_doctor: str = "", date_range: tuple = None):
+        """Индексы приёмов, которые стоит проверять в отчёте, по возрастанию.
+
+        С фильтром по врачу - цепочка индекса врачей, с фильтром по ФИО - приёмы
+        пациентов с этим ФИО (индекс ФИО -> OMS -> дерево приёмов), с диапазоном
+        дат (start, end) - приёмы из дерева дат; при нескольких фильтрах берётся
+        меньший набор. Без фильтров - весь массив приёмов. Остальные фильтры
+        проверяются уже на самих приёмах.
+        """
+        if not filter_name and not filter_doctor and date_range is None:
+            return range(self.first_empty_appointment)
+        candidate_sets = []
+        if date_range is not None:
+            candidate_sets.append(self._appointment_indices_between(*date_range))
+        if filter_doctor:
+            doctor_indices = self.appointment_doctor_tree.get(filter_doctor)
+            candidate_sets.append(list(doctor_indices) if doctor_indices is not None else [])
+        if filter_name:
+            by_name = []
+            patient_indices = self.patient_name_index.get(filter_name)
+            if patient_indices is not None:
+                for patient_index in patient_indices:
+                    appointment_indices = self.appointment_tree.get(self.patient_arr[patient_index].oms_policy)
+                    if appointment_indices is not None:
+                        by_name.extend(appointment_indices)
+            candidate_sets.append(by_name)
+        candidates = min(candidate_sets, key=len)
+        candidates.sort()
+        return candidates
+
+    def generate_report(self, filter_name: str = "", filter_doctor: str = "", filter_date: DateNew = None,
+                        filter_date_to: DateNew = None, sort_by: str = None,
+                        reverse: bool = False) -> MyList[str]:
         """
         Формирует отчёт с фильтрацией.
         
         Args:
             filter_name: фильтр по ФИО пациента (Справочник_1.Поле_2)
             filter_doctor: фильтр по врачу (Справочник_2.Поле_3)
-            filter_date: фильтр по дате приёма (Справочник_2.Поле_4)
+            filter_date: фильтр по дате приёма (Справочник_2.Поле_4); если задан
+                filter_date_to - начало диапазона (None - без нижней границы)
+            filter_date_to: конец диапазона дат приёма включительно
+            sort_by: порядок строк - ключ REPORT_SORT_KEYS ("oms", "name", "doctor", "date");
+                None - порядок массива приёмов. Сортировка устойчивая, reverse - по убыванию
         """
-        report_lines_internal = []
-        for i in range(self.first_empty_appointment):
+        if sort_by is not None and sort_by not in REPORT_SORT_KEYS:
+            valid = ", ".join(REPORT_SORT_KEYS)
+            raise ValueError(f"Unknown report order {sort_by!r}. Valid: {valid}")
+        date_range = None
+        if filter_date_to is not None:
+            date_range = (filter_date, filter_date_to)
+        elif filter_date:
+            date_range = (filter_date, filter_date)
+
+        # Сначала отбираем приёмы по фильтрам, затем одним пакетом ищем их пациентов в ХТ
+        selected_appointments = []
+        for i in self._report_candidates(filter_name, filter_doctor, date_range):
             appointment = self.appointment_arr[i]
             if appointment is None:
                 continue
@@ -371,31 +540,61 @@ class RelationalDatabase:
             # Применяем фильтры на приёме
             if filter_doctor and appointment.doctor != filter_doctor:
                 continue
-            if filter_date and appointment.appointment_date != filter_date:
-                continue
+            if date_range is not None:
+                start, end = date_range
+                if start is not None and appointment.appointment_date < start:
+                    continue
+                if end < appointment.appointment_date:
+                    continue
+            selected_appointments.append(appointment)
+
+        # Поиск пациентов по OMS Policy через ХТ (пакетом)
+        patient_indices = self.patient_ht.search_many([app.oms_policy for app in selected_appointments])
+
+        rows = MyList.from_ordered(self._report_rows(selected_appointments, patient_indices, filter_name))
+        if sort_by is not None:
+            sort_key = REPORT_SORT_KEYS[sort_by]
+            rows.sort(key=lambda row: sort_key(*row), reverse=reverse)
+
+        # Поля через ";" (с ";" внутри - в кавычках), разбираются обратно parse_fields
+        return MyList[str].from_ordered(
+            format_fields((patient.oms_policy, patient.full_name, patient.birth_date,
+                           appointment.diagnosis, appointment.doctor, appointment.appointment_date))
+            for patient, appointment in rows
+        )
 
-            # Поиск пациента по OMS Policy через ХТ
-            patient_search_result = self.patient_ht.search(appointment.oms_policy)
-            patient_item = patient_search_result[0]
-            if patient_item is None:
+    def _report_rows(self, appointments: list, patient_indices, filter_name: str) -> Iterator[tuple]:
+        # Строки отчёта (пациент, приём) в порядке приёмов; patient_indices - из search_many
+        for appointment, patient_index in zip(appointments, patient_indices):
+            if patient_index == -1:
                 print(f"Warning: Appointment for OMS {appointment.oms_policy} has no matching patient.")
                 continue
 
-            patient = self.patient_arr[patient_item.value]
-            
+            patient = self.patient_arr[patient_index]
+
             # Применяем фильтр по ФИО пациента
             if filter_name and patient.full_name != filter_name:
                 continue
+            yield patient, appointment
 
-            line = (f"{patient.oms_policy};{patient.full_name};{patient.birth_date};"
-                    f"{appointment.diagnosis};{appointment.doctor};{appointment.appointment_date}")
-            report_lines_internal.append(line)
-
-        result = MyList[str]()
-        for line in reversed(report_lines_internal):
-            result.append(line)
+    # --- Метрики ---
+    def stats(self) -> dict:
+        """Снимок метрик для мониторинга: заполненность массивов, высоты деревьев и счётчики ХТ.
 
-        return result
+        Дёшев: не обходит ни ячейки ХТ, ни узлы деревьев.
+        """
+        return {
+            "max_size": self.max_size,
+            "patients": self.first_empty_patient,
+            "appointments": self.first_empty_appointment,
+            "appointment_tree_height": self.appointment_tree.height,
+            "appointment_date_tree_height": self.appointment_date_tree.height,
+            "appointment_doctor_tree_height": self.appointment_doctor_tree.height,
+            # Число различных ключей: размер поддерева корня, O(1)
+            "distinct_appointment_dates": len(self.appointment_date_tree),
+            "distinct_doctors": len(self.appointment_doctor_tree),
+            "patient_ht": self.patient_ht.stats(),
+        }
 
     # --- Отладка ---
     def get_patient_ht_debug(self):
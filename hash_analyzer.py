@@ -0,0 +1,149 @@
+# hash_analyzer.py - Анализ качества хеш-функций на реальных полисах ОМС
+#
+# Запуск: python hash_analyzer.py patients.txt [--capacity N] [--strategy mix64 ...]
+# Для каждой стратегии строит статическую ХТ на ключах из файла и печатает
+# заполненность корзин, длины кластеров, среднее/максимальное число проб и время.
+
+import argparse
+import random
+import sys
+import time
+from typing import List, Optional
+
+from hash_table import HashTable, HASH_STRATEGIES, make_hash_strategy
+
+
+def load_oms_keys(filename: str) -> List[int]:
+    """Читает полисы ОМС (первое поле строки) из файла пациентов, пропуская некорректные строки."""
+    keys: List[int] = []
+    seen = set()
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            oms_str = line.split(';', 1)[0].strip()
+            try:
+                oms_policy = int(oms_str)
+            except ValueError:
+                continue
+            if oms_policy < 0 or oms_policy in seen:
+                continue
+            seen.add(oms_policy)
+            keys.append(oms_policy)
+    return keys
+
+
+def default_capacity(key_count: int, load_factor: float = HashTable.DEFAULT_MAX_LOAD_FACTOR) -> int:
+    """Размер таблицы, при котором ключи займут не больше load_factor ячеек (но не меньше STATIC_CAPACITY)."""
+    return max(HashTable.STATIC_CAPACITY, int(key_count / load_factor) + 1)
+
+
+def cluster_lengths(ht: HashTable) -> List[int]:
+    """Длины непрерывных серий занятых/удалённых ячеек (с учётом кольцевого пробирования)."""
+    statuses = [ht._elements[i].status for i in range(ht.capacity)]
+    if all(s != 0 for s in statuses):
+        return [ht.capacity]
+    # Начинаем обход с пустой ячейки, чтобы кластер на стыке конца и начала не разрезался
+    start = statuses.index(0)
+    lengths: List[int] = []
+    run = 0
+    for offset in range(1, ht.capacity + 1):
+        if statuses[(start + offset) % ht.capacity] != 0:
+            run += 1
+        elif run:
+            lengths.append(run)
+            run = 0
+    return lengths
+
+
+def analyze(keys: List[int], strategy_name: str, capacity: int, miss_samples: int = 10000,
+            seed: int = 0) -> dict:
+    """Строит ХТ с заданной стратегией и собирает статистику коллизий."""
+    ht = HashTable(capacity=capacity, hash_strategy=make_hash_strategy(strategy_name))
+
+    started = time.perf_counter()
+    for index, key in enumerate(keys):
+        ht.insert(key, index)
+    insert_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hit_probes = [ht.search(key)[1] for key in keys]
+    search_seconds = time.perf_counter() - started
+
+    # Промахи - случайные 16-значные полисы, которых нет в файле
+    rnd = random.Random(seed)
+    present = set(keys)
+    miss_probes: List[int] = []
+    while len(miss_probes) < miss_samples:
+        key = rnd.randrange(10 ** 15, 10 ** 16)
+        if key not in present:
+            miss_probes.append(ht.search(key)[1])
+
+    home_buckets = {ht.hash(key) for key in keys}
+    clusters = cluster_lengths(ht)
+    return {
+        "strategy": strategy_name,
+        "capacity": capacity,
+        "keys": len(keys),
+        "load_factor": ht.size / capacity,
+        "home_buckets": len(home_buckets),
+        "bucket_occupancy": len(home_buckets) / capacity,
+        "clusters": len(clusters),
+        "avg_cluster": sum(clusters) / len(clusters) if clusters else 0.0,
+        "max_cluster": max(clusters) if clusters else 0,
+        "avg_hit_probes": sum(hit_probes) / len(hit_probes) if hit_probes else 0.0,
+        "max_hit_probes": max(hit_probes) if hit_probes else 0,
+        "avg_miss_probes": sum(miss_probes) / len(miss_probes) if miss_probes else 0.0,
+        "max_miss_probes": max(miss_probes) if miss_probes else 0,
+        "insert_seconds": insert_seconds,
+        "search_seconds": search_seconds,
+    }
+
+
+def format_report(results: List[dict]) -> str:
+    header = (f"{'strategy':<20}{'buckets used':>14}{'occupancy':>11}{'clusters':>10}"
+              f"{'avg clu':>9}{'max clu':>9}{'avg hit':>9}{'max hit':>9}"
+              f"{'avg miss':>10}{'max miss':>10}{'insert s':>10}{'search s':>10}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['strategy']:<20}{r['home_buckets']:>14}{r['bucket_occupancy']:>11.1%}{r['clusters']:>10}"
+            f"{r['avg_cluster']:>9.2f}{r['max_cluster']:>9}{r['avg_hit_probes']:>9.2f}{r['max_hit_probes']:>9}"
+            f"{r['avg_miss_probes']:>10.2f}{r['max_miss_probes']:>10}"
+            f"{r['insert_seconds']:>10.3f}{r['search_seconds']:>10.3f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Collision-quality report for HashTable hash strategies.")
+    arg_parser.add_argument("filename", help="patient file (oms;full_name;birth_date per line)")
+    arg_parser.add_argument("--capacity", type=int, default=None,
+                            help="table capacity (default: keys / max load factor, at least 1000)")
+    arg_parser.add_argument("--strategy", action="append", choices=sorted(HASH_STRATEGIES),
+                            help="strategy to analyze (repeatable; default: all)")
+    arg_parser.add_argument("--miss-samples", type=int, default=10000,
+                            help="number of absent keys probed for miss statistics")
+    args = arg_parser.parse_args(argv)
+
+    keys = load_oms_keys(args.filename)
+    if not keys:
+        print(f"No valid OMS policies found in {args.filename}.")
+        return 1
+    capacity = args.capacity if args.capacity is not None else default_capacity(len(keys))
+    if capacity < len(keys):
+        print(f"Capacity {capacity} is smaller than the number of keys ({len(keys)}).")
+        return 1
+
+    print(f"File: {args.filename} | keys: {len(keys)} | capacity: {capacity} | "
+          f"load factor: {len(keys) / capacity:.1%}")
+    strategies = args.strategy or list(HASH_STRATEGIES)
+    results = [analyze(keys, name, capacity, args.miss_samples) for name in strategies]
+    print(format_report(results))
+    fastest = min(results, key=lambda r: r["avg_hit_probes"])
+    print(f"Fewest probes per hit: {fastest['strategy']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
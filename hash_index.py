@@ -0,0 +1,111 @@
+# hash_index.py - Неупорядоченный вторичный индекс: ключ -> цепочка индексов записей
+
+import itertools
+from typing import Generic, Iterator, Optional, TypeVar
+
+from avl_tree import IndexChain
+from paged_array import PagedDict
+
+T = TypeVar('T')
+
+# Поколения для снимков (как в AVLTree): цепочка меняется на месте только индексом-владельцем
+_epochs = itertools.count(1)
+
+
+class HashIndex(Generic[T]):
+    """Индекс по хешируемому ключу без порядка: get - O(1) + длина цепочки.
+
+    Интерфейс - подмножество AVLTree, которым пользуется RelationalDatabase для индекса
+    по ФИО: insert, get, find_steps, delete_value, delete_by_value_only, move_value,
+    key_of и snapshot. Ключи и обратный индекс (значение -> ключ) лежат в
+    PagedDict, поэтому снимок - O(число страниц), а запись после него копирует только
+    свои страницы и свою цепочку.
+    """
+
+    def __init__(self) -> None:
+        self._chains: PagedDict = PagedDict()
+        self._key_by_value: PagedDict = PagedDict()
+        self._epoch: int = next(_epochs)
+
+    def __len__(self) -> int:
+        # Число различных ключей
+        return len(self._chains)
+
+    def __iter__(self) -> Iterator[tuple]:
+        # Пары (ключ, цепочка) в произвольном порядке
+        return self._chains.items()
+
+    def snapshot(self) -> 'HashIndex[T]':
+        """Неизменяемый снимок индекса: страницы и цепочки общие до первой записи в них."""
+        snap = HashIndex.__new__(HashIndex)
+        snap._chains = self._chains.copy()
+        snap._key_by_value = self._key_by_value.copy()
+        snap._epoch = next(_epochs)
+        self._epoch = next(_epochs)
+        return snap
+
+    def _own_chain(self, key: T) -> Optional[IndexChain]:
+        # Цепочку можно менять, только если она не общая со снимком
+        chain = self._chains.get(key)
+        if chain is not None and chain.epoch != self._epoch:
+            chain = chain.copy(self._epoch)
+            self._chains[key] = chain
+        return chain
+
+    def insert(self, key: T, value: int) -> IndexChain:
+        if value in self._key_by_value:
+            chain = self._chains.get(key)
+            if chain is not None and value in chain:
+                return chain
+            raise ValueError(f"Value {value!r} is already indexed under key {self._key_by_value[value]!r}")
+        chain = self._own_chain(key)
+        if chain is None:
+            chain = IndexChain(self._epoch)
+            self._chains[key] = chain
+        chain.append(value)
+        self._key_by_value[value] = key
+        return chain
+
+    def get(self, key: T) -> Optional[IndexChain]:
+        # Цепочка индексов по ключу или None
+        return self._chains.get(key)
+
+    def find_steps(self, key: T) -> tuple:
+        # Для отображения, как у AVLTree: (цепочка или None, количество шагов) - шаг всегда один
+        return self._chains.get(key), 1
+
+    def key_of(self, value: int) -> Optional[T]:
+        return self._key_by_value.get(value)
+
+    def delete_value(self, key: T, value: int) -> bool:
+        chain = self._chains.get(key)
+        if chain is None or value not in chain:
+            return False
+        if len(chain) == 1:
+            del self._chains[key]
+        else:
+            self._own_chain(key).remove(value)
+        del self._key_by_value[value]
+        return True
+
+    def delete_by_value_only(self, value: int) -> bool:
+        if value not in self._key_by_value:
+            return False
+        return self.delete_value(self._key_by_value[value], value)
+
+    def move_value(self, old_value: int, new_value: int) -> bool:
+        """Переносит значение под тем же ключом (запись переехала на другой индекс)."""
+        if old_value not in self._key_by_value:
+            return False
+        if new_value in self._key_by_value:
+            raise ValueError(f"Value {new_value!r} is already indexed under key {self._key_by_value[new_value]!r}")
+        key = self._key_by_value[old_value]
+        chain = self._own_chain(key)
+        chain.remove(old_value)
+        chain.append(new_value)
+        del self._key_by_value[old_value]
+        self._key_by_value[new_value] = key
+        return True
+
+    def __repr__(self) -> str:
+        return f"HashIndex(keys={len(self._chains)}, values={len(self._key_by_value)})"
@@ -1,9 +1,19 @@
-# hash_table.py (Статическая ХТ с методом середины квадрата)
+# hash_table.py (ХТ с открытой адресацией; по умолчанию - метод середины квадрата)
 import math
 import ctypes
-from typing import Optional
+import itertools
+from abc import ABC, abstractmethod
+from array import array
+from typing import Optional, List
+
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен: без него пакетные хеши считаются в цикле
+    np = None
 
 class Item:
+    __slots__ = ("key", "value", "status")
+
     def __init__(self, key: Optional[int] = None, value: Optional[int] = None, status: int = 0) -> None:
         self.key: Optional[int] = key
         self.value: Optional[int] = value
@@ -12,30 +22,51 @@ class Item:
     def __repr__(self) -> str:
         return f"Item(key={self.key}, value={self.value}, status={self.status})"
 
-class HashTable:
-    # Фиксированный размер таблицы
-    STATIC_CAPACITY: int = 1000
+# --- Хеш-функции (подключаемые стратегии) ---
+# Стратегия - вызываемый объект strategy(key, capacity) -> индекс ячейки в [0, capacity);
+# strategy.hash_many(keys, capacity) считает хеши сразу для списка ключей
+MASK64: int = (1 << 64) - 1
 
-    def __init__(self) -> None:
-        self.capacity: int = self.STATIC_CAPACITY
-        self.size: int = 0
-        # Убираем load_factor и threshold
-        ArrayType = ctypes.py_object * self.capacity
-        self._elements: ctypes.Array = ArrayType()
-        for i in range(self.capacity):
-            self._elements[i] = Item(status=0)
 
-    @staticmethod
-    def _assert_int(var: int) -> None:
-        if not isinstance(var, int):
-            raise TypeError(f"Expected int, got {type(var).__name__}")
+def _np_keys(keys: List[int]):
+    # Ключи как uint64-массив NumPy или None, если NumPy нет или ключ не влезает в 64 бита
+    if np is None or not keys:
+        return None
+    try:
+        return np.array(keys, dtype=np.uint64)
+    except OverflowError:
+        return None
 
-    # --- НОВАЯ ХЕШ-ФУНКЦИЯ: Середина квадрата ---
-    def hash(self, key: int) -> int:
-        self._assert_int(key)
-        if key < 0:
-            raise ValueError("Key must be non-negative for 'middle square' hash.")
 
+def _np_scale(h, capacity: int):
+    # (h * capacity) >> 64 для uint64-массива без 128-битной арифметики (capacity < 2**32)
+    cap = np.uint64(capacity)
+    shift = np.uint64(32)
+    hi = h >> shift
+    lo = h & np.uint64(0xFFFFFFFF)
+    return (hi * cap + ((lo * cap) >> shift)) >> shift
+
+
+class MiddleSquareHash:
+    """Метод середины квадрата: d цифр из середины key**2 по модулю capacity.
+
+    По умолчанию d = 2, как у статической таблицы HashTable(): не больше 100 разных
+    ячеек при любом capacity. digits=None - ширина окна подбирается под capacity
+    (см. WideMiddleSquareHash).
+    """
+    name: str = "middle_square"
+    title: str = "середина квадрата"
+
+    def __init__(self, digits: Optional[int] = 2) -> None:
+        self.digits: Optional[int] = digits
+
+    def _middle_digits(self, capacity: int) -> int:
+        if self.digits is not None:
+            return self.digits
+        # Середина квадрата должна покрывать все capacity ячеек
+        return max(HashTable.MIDDLE_DIGITS, len(str(capacity - 1)))
+
+    def __call__(self, key: int, capacity: int) -> int:
         k = key
         k_squared = k * k
 
@@ -53,10 +84,10 @@ class HashTable:
             k_squared_padded = k_squared
             padded_digit_count = digit_count
 
+        # d — количество цифр, которые берём из середины (2 для статической таблицы)
+        d = self._middle_digits(capacity)
         # r — количество младших разрядов, которые нужно отбросить
-        r = (padded_digit_count // 2) - 1
-        # d — количество цифр, которые берём из середины (всегда 2)
-        d = 2
+        r = max((padded_digit_count - d) // 2, 0)
 
         # Отбрасываем r младших разрядов
         temp = k_squared_padded // (10 ** r)
@@ -64,13 +95,655 @@ class HashTable:
         middle_digits = temp % (10 ** d)
 
         # Применяем модуль от capacity
-        return middle_digits % self.capacity
-    # --- КОНЕЦ НОВОЙ ХЕШ-ФУНКЦИИ ---
+        return middle_digits % capacity
+
+    def hash_many(self, keys: List[int], capacity: int) -> List[int]:
+        # Квадрат 16-значного ключа не помещается в 64 бита - векторизовать нечего
+        return [self(key, capacity) for key in keys]
+
+    def __repr__(self) -> str:
+        return f"MiddleSquareHash(digits={self.digits})"
+
+
+class WideMiddleSquareHash(MiddleSquareHash):
+    """Середина квадрата с окном под capacity: цифр берётся столько, чтобы покрыть все ячейки.
+
+    Для растущей таблицы, где 2 цифры оставили бы занятыми лишь 100 ячеек.
+    """
+    name: str = "middle_square_wide"
+    title: str = "середина квадрата (окно под размер)"
+
+    def __init__(self) -> None:
+        super().__init__(None)
+
+    def __repr__(self) -> str:
+        return "WideMiddleSquareHash()"
+
+
+class FibonacciHash:
+    """Мультипликативный метод Кнута: key * 2**64/phi (mod 2**64), затем старшие биты."""
+    name: str = "fibonacci"
+    title: str = "мультипликативный (Фибоначчи)"
+    MULTIPLIER: int = 11400714819323198485  # round(2**64 / золотое сечение), нечётное
+
+    def __call__(self, key: int, capacity: int) -> int:
+        h = (key * self.MULTIPLIER) & MASK64
+        # Отображаем 64-битный хеш в [0, capacity) умножением и сдвигом (без деления)
+        return (h * capacity) >> 64
+
+    def hash_many(self, keys: List[int], capacity: int) -> List[int]:
+        h = _np_keys(keys)
+        if h is None or capacity >= 1 << 32:
+            return [self(key, capacity) for key in keys]
+        # Умножение uint64 в NumPy и так идёт по модулю 2**64
+        h = h * np.uint64(self.MULTIPLIER)
+        return _np_scale(h, capacity).tolist()
+
+    def __repr__(self) -> str:
+        return "FibonacciHash()"
+
+
+class Mix64Hash:
+    """Перемешивание 64 бит (финализатор splitmix64): все цифры 16-значного полиса влияют на все биты хеша."""
+    name: str = "mix64"
+    title: str = "перемешивание 64 бит (splitmix64)"
+
+    def __call__(self, key: int, capacity: int) -> int:
+        z = (key + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        z ^= z >> 31
+        return (z * capacity) >> 64
+
+    def hash_many(self, keys: List[int], capacity: int) -> List[int]:
+        z = _np_keys(keys)
+        if z is None or capacity >= 1 << 32:
+            return [self(key, capacity) for key in keys]
+        z = z + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+        return _np_scale(z, capacity).tolist()
+
+    def __repr__(self) -> str:
+        return "Mix64Hash()"
+
+
+# Реестр стратегий по имени (для анализатора коллизий и настройки)
+HASH_STRATEGIES = {
+    MiddleSquareHash.name: MiddleSquareHash,
+    WideMiddleSquareHash.name: WideMiddleSquareHash,
+    FibonacciHash.name: FibonacciHash,
+    Mix64Hash.name: Mix64Hash,
+}
+
+
+def make_hash_strategy(name: str):
+    try:
+        return HASH_STRATEGIES[name]()
+    except KeyError:
+        valid = ", ".join(HASH_STRATEGIES)
+        raise ValueError(f"Unknown hash strategy {name!r}. Valid: {valid}")
+
+
+# --- Хранилища ячеек ---
+# Хранилище - массив ячеек фиксированного размера со статусами 0 (пусто), 1 (занято), 2 (удалено).
+# ХТ работает с ним только через status/key/value/dist/store/set_status/clear; slot[i] возвращает Item.
+# dist - расстояние ключа от его "дома" (ячейки первичного хеша); ведётся только для Robin Hood,
+# чтобы сравнивать расстояния при вытеснении и поиске без повторного хеширования ключей ячеек.
+
+# Ячеек на странице хранилища (степень двойки: номер страницы - сдвигом, позиция - маской)
+STORAGE_PAGE_BITS: int = 12
+STORAGE_PAGE_SIZE: int = 1 << STORAGE_PAGE_BITS
+STORAGE_PAGE_MASK: int = STORAGE_PAGE_SIZE - 1
+# Поколения владельцев страниц хранилищ (см. _PagedStorage.copy)
+_storage_epochs = itertools.count(1)
+
+
+class _PagedStorage(ABC):
+    """Общая часть хранилищ: ячейки лежат страницами по STORAGE_PAGE_SIZE (последняя может быть
+    короче). copy() делит страницы с копией за O(число страниц); первая запись в общую
+    страницу с любой стороны копирует только её (так снимок БД не копирует таблицу целиком).
+    Наследник задаёт _arrays - имена атрибутов со списками страниц - и _new_pages(size)."""
+    _arrays: tuple = ()
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity: int = capacity
+        for name in self._arrays:
+            setattr(self, name, [])
+        for start in range(0, capacity, STORAGE_PAGE_SIZE):
+            for name, page in zip(self._arrays, self._new_pages(min(STORAGE_PAGE_SIZE, capacity - start))):
+                getattr(self, name).append(page)
+        self._epoch: int = next(_storage_epochs)
+        # Поколение, которому принадлежит каждая страница; менять на месте можно только свои
+        self._owners: list = [self._epoch] * len(getattr(self, self._arrays[0]))
+
+    def __len__(self) -> int:
+        return self.capacity
+
+    @abstractmethod
+    def _new_pages(self, size: int) -> tuple:
+        """Новая страница из size пустых ячеек: по массиву на каждое имя из _arrays, в том же порядке."""
+
+    def _own_page(self, page_no: int) -> None:
+        # Страница общая с копией хранилища: все её массивы заменяются своими копиями
+        for name in self._arrays:
+            pages = getattr(self, name)
+            page = pages[page_no]
+            if isinstance(page, ctypes.Array):
+                new_page = (ctypes.py_object * len(page))()
+                new_page[:] = page[:]
+                pages[page_no] = new_page
+            else:
+                pages[page_no] = page[:]
+        self._owners[page_no] = self._epoch
+
+    def copy(self) -> "_PagedStorage":
+        storage = type(self).__new__(type(self))
+        storage.capacity = self.capacity
+        for name in self._arrays:
+            setattr(storage, name, list(getattr(self, name)))
+        storage._owners = list(self._owners)
+        storage._epoch = next(_storage_epochs)
+        # Общие страницы больше не принадлежат и оригиналу
+        self._epoch = next(_storage_epochs)
+        return storage
+
+
+class ItemStorage(_PagedStorage):
+    """Ячейки - отдельные объекты Item в массивах ctypes.py_object (исходная раскладка)."""
+    name: str = "items"
+    _arrays: tuple = ("_items", "_dists")
+
+    def _new_pages(self, size: int) -> tuple:
+        items = (ctypes.py_object * size)()
+        # Item не меняется на месте (см. set_status), поэтому пустые ячейки делят один объект
+        items[:] = [Item(status=0)] * size
+        return items, array('i', bytes(4 * size))
+
+    def __getitem__(self, i: int) -> Item:
+        return self._items[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK]
+
+    def status(self, i: int) -> int:
+        return self._items[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK].status
+
+    def key(self, i: int) -> int:
+        return self._items[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK].key
+
+    def value(self, i: int) -> int:
+        return self._items[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK].value
+
+    def dist(self, i: int) -> int:
+        return self._dists[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK]
+
+    def store(self, i: int, key: int, value: int, dist: int = 0) -> None:
+        page_no = i >> STORAGE_PAGE_BITS
+        if self._owners[page_no] != self._epoch:
+            self._own_page(page_no)
+        self._items[page_no][i & STORAGE_PAGE_MASK] = Item(key, value, 1)
+        self._dists[page_no][i & STORAGE_PAGE_MASK] = dist
+
+    def set_status(self, i: int, status: int) -> None:
+        # Item не меняется на месте - его может делить копия страницы (см. copy)
+        page_no = i >> STORAGE_PAGE_BITS
+        if self._owners[page_no] != self._epoch:
+            self._own_page(page_no)
+        item = self._items[page_no][i & STORAGE_PAGE_MASK]
+        self._items[page_no][i & STORAGE_PAGE_MASK] = Item(item.key, item.value, status)
+
+    def clear(self, i: int) -> None:
+        page_no = i >> STORAGE_PAGE_BITS
+        if self._owners[page_no] != self._epoch:
+            self._own_page(page_no)
+        self._items[page_no][i & STORAGE_PAGE_MASK] = Item(status=0)
+
+
+class CompactStorage(_PagedStorage):
+    """Ячейки в параллельных типизированных массивах: array('q') для ключей и значений,
+    bytearray для статусов, array('i') для расстояний - 21 байт на ячейку вместо
+    отдельного объекта Item.
+    Ключи и значения должны помещаться в знаковые 64 бита."""
+    name: str = "compact"
+    _arrays: tuple = ("_keys", "_values", "_statuses", "_dists")
+
+    def _new_pages(self, size: int) -> tuple:
+        return array('q', bytes(8 * size)), array('q', bytes(8 * size)), bytearray(size), array('i', bytes(4 * size))
+
+    def __getitem__(self, i: int) -> Item:
+        # Снимок ячейки для отладки/визуализации (изменения Item не попадают в таблицу)
+        status = self.status(i)
+        if status == 0:
+            return Item(status=0)
+        return Item(self.key(i), self.value(i), status)
+
+    def status(self, i: int) -> int:
+        return self._statuses[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK]
+
+    def key(self, i: int) -> int:
+        return self._keys[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK]
+
+    def value(self, i: int) -> int:
+        return self._values[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK]
+
+    def dist(self, i: int) -> int:
+        return self._dists[i >> STORAGE_PAGE_BITS][i & STORAGE_PAGE_MASK]
+
+    def store(self, i: int, key: int, value: int, dist: int = 0) -> None:
+        page_no, offset = i >> STORAGE_PAGE_BITS, i & STORAGE_PAGE_MASK
+        if self._owners[page_no] != self._epoch:
+            self._own_page(page_no)
+        try:
+            self._keys[page_no][offset] = key
+            self._values[page_no][offset] = value
+        except OverflowError:
+            raise ValueError("Key and value must fit into 64 bits for compact storage")
+        self._statuses[page_no][offset] = 1
+        self._dists[page_no][offset] = dist
+
+    def set_status(self, i: int, status: int) -> None:
+        page_no = i >> STORAGE_PAGE_BITS
+        if self._owners[page_no] != self._epoch:
+            self._own_page(page_no)
+        self._statuses[page_no][i & STORAGE_PAGE_MASK] = status
+
+    def clear(self, i: int) -> None:
+        self.set_status(i, 0)
+
+
+STORAGE_TYPES = {
+    ItemStorage.name: ItemStorage,
+    CompactStorage.name: CompactStorage,
+}
+
+
+class HashTable:
+    # Фиксированный размер таблицы (размер по умолчанию и начальный размер растущей таблицы)
+    STATIC_CAPACITY: int = 1000
+    # Порог заполненности (занятые + удалённые ячейки), после которого растущая таблица расширяется
+    DEFAULT_MAX_LOAD_FACTOR: float = 0.75
+    # Сколько ячеек старой таблицы переносится за одну операцию insert/search/delete
+    DEFAULT_MIGRATE_STEP: int = 8
+    # Количество цифр из середины квадрата для статической таблицы
+    MIDDLE_DIGITS: int = 2
+    # Доля "могил" от capacity, после которой delete запускает очистку на месте
+    DEFAULT_TOMBSTONE_THRESHOLD: float = 0.25
+    # Число корзин гистограмм длин проб: корзина i - i+1 проба, последняя - всё, что длиннее
+    PROBE_HISTOGRAM_SIZE: int = 32
+
+    def __init__(self, capacity: int = STATIC_CAPACITY, resizable: bool = False,
+                 max_load_factor: float = DEFAULT_MAX_LOAD_FACTOR,
+                 migrate_step: int = DEFAULT_MIGRATE_STEP, hash_strategy=None,
+                 storage: str = ItemStorage.name, robin_hood: bool = False,
+                 tombstone_threshold: Optional[float] = DEFAULT_TOMBSTONE_THRESHOLD) -> None:
+        self._assert_int(capacity)
+        self._assert_int(migrate_step)
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        if not (0 < max_load_factor < 1):
+            raise ValueError("max_load_factor must be in (0, 1)")
+        if migrate_step <= 0:
+            raise ValueError("migrate_step must be positive")
+        if tombstone_threshold is not None and not (0 < tombstone_threshold <= 1):
+            raise ValueError("tombstone_threshold must be in (0, 1] or None")
+        if storage not in STORAGE_TYPES:
+            valid = ", ".join(STORAGE_TYPES)
+            raise ValueError(f"Unknown storage {storage!r}. Valid: {valid}")
+
+        self.capacity: int = capacity
+        self.size: int = 0
+        # Режим роста: при превышении max_load_factor таблица удваивается,
+        # а элементы переносятся постепенно (по migrate_step ячеек за операцию)
+        self.resizable: bool = resizable
+        self.max_load_factor: float = max_load_factor
+        self.migrate_step: int = migrate_step
+        # Хеш-функция: по умолчанию середина квадрата (2 цифры для статической таблицы,
+        # окно под размер - для растущей)
+        if hash_strategy is None:
+            hash_strategy = WideMiddleSquareHash() if resizable else MiddleSquareHash(self.MIDDLE_DIGITS)
+        elif isinstance(hash_strategy, str):
+            hash_strategy = make_hash_strategy(hash_strategy)
+        self.hash_strategy = hash_strategy
+        # Раскладка ячеек: объекты Item ("items") или параллельные массивы ("compact")
+        self.storage: str = storage
+        # Robin Hood: при вставке "бедный" ключ (дальше от своей ячейки) вытесняет "богатый",
+        # удаление - обратным сдвигом без могил; поиск останавливается раньше
+        self.robin_hood: bool = robin_hood
+        # Порог автоматической очистки могил (None - не чистить)
+        self.tombstone_threshold: Optional[float] = tombstone_threshold
+        # Количество "могил" (status == 2) в текущей таблице
+        self.tombstones: int = 0
+        self._elements = self._allocate(capacity)
+
+        # Состояние постепенного рехеширования: старая таблица и позиция переноса
+        self._old_elements = None
+        self._old_capacity: int = 0
+        self._migrate_pos: int = 0
+
+        # Счётчики для мониторинга (см. stats); _probes - длина последней пробы _locate
+        self._probes: int = 0
+        self.reset_metrics()
+        self.resizes: int = 0
+        self.purges: int = 0
+
+    def _allocate(self, capacity: int):
+        return STORAGE_TYPES[self.storage](capacity)
+
+    def copy(self) -> "HashTable":
+        """Независимая копия таблицы вместе с незаконченным переносом и метриками.
+
+        Страницы ячеек общие с копией до первой записи в них (см. _PagedStorage.copy):
+        копия - O(число страниц), без повторных вставок.
+        """
+        clone = type(self).__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._elements = self._elements.copy()
+        if self._old_elements is not None:
+            clone._old_elements = self._old_elements.copy()
+        clone._insert_histogram = list(self._insert_histogram)
+        clone._hit_histogram = list(self._hit_histogram)
+        clone._miss_histogram = list(self._miss_histogram)
+        return clone
+
+    # --- Метрики ---
+    def reset_metrics(self) -> None:
+        """Обнуляет гистограммы длин проб и счётчики операций."""
+        size = self.PROBE_HISTOGRAM_SIZE
+        self._insert_histogram: List[int] = [0] * size
+        self._hit_histogram: List[int] = [0] * size
+        self._miss_histogram: List[int] = [0] * size
+        self._insert_probes: int = 0
+        self._hit_probes: int = 0
+        self._miss_probes: int = 0
+
+    def _record(self, histogram: List[int], probes: int) -> None:
+        histogram[probes - 1 if probes < self.PROBE_HISTOGRAM_SIZE else -1] += 1
+
+    def _record_lookup(self, found: bool, probes: int) -> None:
+        if found:
+            self._record(self._hit_histogram, probes)
+            self._hit_probes += probes
+        else:
+            self._record(self._miss_histogram, probes)
+            self._miss_probes += probes
+
+    def _record_insert(self, idx: int, h0: int) -> None:
+        probes = (idx - h0) % self.capacity + 1
+        self._record(self._insert_histogram, probes)
+        self._insert_probes += probes
+
+    def longest_cluster(self) -> int:
+        """Самый длинный кластер (серия непустых ячеек, могилы тоже) текущей таблицы.
+
+        Дорогой вызов: обходит все ячейки, O(capacity). Поэтому его нет в stats() -
+        мониторинг вызывает его отдельно и редко.
+        """
+        elements = self._elements
+        longest = run = 0
+        for idx in range(self.capacity):
+            if elements.status(idx) != 0:
+                run += 1
+                if run > longest:
+                    longest = run
+            else:
+                run = 0
+        # Кластер может переходить через конец таблицы в начало
+        if run and run < self.capacity:
+            idx = 0
+            while elements.status(idx) != 0:
+                run += 1
+                idx += 1
+            longest = max(longest, run)
+        return longest
+
+    def stats(self) -> dict:
+        """Снимок счётчиков за O(PROBE_HISTOGRAM_SIZE), без обхода ячеек
+        (самый длинный кластер - отдельный вызов longest_cluster()).
+
+        Гистограммы: элемент i - число операций с i+1 пробой, последний - с
+        PROBE_HISTOGRAM_SIZE и более.
+        """
+        hits = sum(self._hit_histogram)
+        misses = sum(self._miss_histogram)
+        inserts = sum(self._insert_histogram)
+        return {
+            "capacity": self.capacity,
+            "size": self.size,
+            "tombstones": self.tombstones,
+            "load_factor": self.load_factor,
+            "hash_strategy": self.hash_strategy.name,
+            "storage": self.storage,
+            "robin_hood": self.robin_hood,
+            "migrating": self.migrating,
+            "migration_progress": self._migrate_pos / self._old_capacity if self.migrating else 1.0,
+            "resizes": self.resizes,
+            "purges": self.purges,
+            "inserts": inserts,
+            "hits": hits,
+            "misses": misses,
+            "avg_insert_probes": self._insert_probes / inserts if inserts else 0.0,
+            "avg_hit_probes": self._hit_probes / hits if hits else 0.0,
+            "avg_miss_probes": self._miss_probes / misses if misses else 0.0,
+            "insert_probe_histogram": list(self._insert_histogram),
+            "hit_probe_histogram": list(self._hit_histogram),
+            "miss_probe_histogram": list(self._miss_histogram),
+        }
+
+    @staticmethod
+    def _assert_int(var: int) -> None:
+        if not isinstance(var, int):
+            raise TypeError(f"Expected int, got {type(var).__name__}")
+
+    @property
+    def load_factor(self) -> float:
+        return (self.size + self.tombstones) / self.capacity
+
+    @property
+    def migrating(self) -> bool:
+        return self._old_elements is not None
+
+    # --- Хеш-функция (делегируется стратегии) ---
+    def hash(self, key: int) -> int:
+        return self._hash(key, self.capacity)
+
+    def _hash(self, key: int, capacity: int) -> int:
+        self._assert_int(key)
+        if key < 0:
+            raise ValueError("Key must be non-negative for hashing.")
+        return self.hash_strategy(key, capacity)
+    # --- Конец хеш-функции ---
 
     def probe(self, h0: int, i: int) -> int:
         # Линейное пробирование
         return (h0 + i) % self.capacity
 
+    # --- Постепенное рехеширование ---
+    def _start_resize(self, new_capacity: int) -> None:
+        # Если предыдущий перенос ещё не закончен, дожимаем его перед новым ростом
+        self.finish_migration()
+        self._old_elements = self._elements
+        self._old_capacity = self.capacity
+        self._migrate_pos = 0
+        self._elements = self._allocate(new_capacity)
+        self.capacity = new_capacity
+        self.tombstones = 0
+        self.resizes += 1
+
+    def finish_migration(self) -> None:
+        """Переносит все оставшиеся ячейки старой таблицы: после этого поиск ничего не меняет
+        в ячейках, и таблицу можно безопасно делить с читателями (снимки БД)."""
+        if self.migrating:
+            self._migrate(self._old_capacity)
+
+    def _migrate(self, count: int) -> None:
+        # Переносит до count ячеек старой таблицы в текущую
+        old = self._old_elements
+        if old is None:
+            return
+        end = min(self._migrate_pos + count, self._old_capacity)
+        for pos in range(self._migrate_pos, end):
+            if old.status(pos) == 1:
+                self._place(old.key(pos), old.value(pos))
+                # Ячейку в старой таблице превращаем в "могилу", чтобы не разорвать цепочки
+                old.set_status(pos, 2)
+        self._migrate_pos = end
+        if end >= self._old_capacity:
+            self._old_elements = None
+            self._old_capacity = 0
+            self._migrate_pos = 0
+
+    def _place(self, key: int, value: int) -> int:
+        # Кладёт заведомо отсутствующий ключ в первую свободную/удалённую ячейку
+        if self.robin_hood:
+            return self._robin_hood_place(key, value)
+        elements = self._elements
+        h0 = self._hash(key, self.capacity)
+        for i in range(self.capacity):
+            idx = (h0 + i) % self.capacity
+            status = elements.status(idx)
+            if status != 1:
+                if status == 2:
+                    self.tombstones -= 1
+                elements.store(idx, key, value)
+                return idx
+        raise Exception("Hash table is full")
+
+    def _robin_hood_place(self, key: int, value: int, h0: Optional[int] = None) -> int:
+        # Вставка с вытеснением: если у ключа в ячейке расстояние до "дома" меньше нашего,
+        # занимаем ячейку, а вытесненный ключ несём дальше. Возвращает ячейку нового ключа.
+        # Расстояния ключей в ячейках хранятся в хранилище (elements.dist), не пересчитываются
+        elements = self._elements
+        capacity = self.capacity
+        idx = self._hash(key, capacity) if h0 is None else h0
+        dist = 0
+        placed_idx = -1
+        for _ in range(capacity):
+            status = elements.status(idx)
+            if status != 1:
+                if status == 2:
+                    self.tombstones -= 1
+                elements.store(idx, key, value, dist)
+                return placed_idx if placed_idx != -1 else idx
+            slot_dist = elements.dist(idx)
+            if slot_dist < dist:
+                slot_key = elements.key(idx)
+                slot_value = elements.value(idx)
+                elements.store(idx, key, value, dist)
+                if placed_idx == -1:
+                    placed_idx = idx
+                key, value, dist = slot_key, slot_value, slot_dist
+            idx = (idx + 1) % capacity
+            dist += 1
+        raise Exception("Hash table is full")
+
+    def _find(self, key: int, h0: Optional[int] = None) -> tuple:
+        # Инструментированный поиск (для search): (индекс или -1, шаги); h0 - готовый хеш
+        elements = self._elements
+        capacity = self.capacity
+        if h0 is None:
+            h0 = self.hash(key)
+        steps: int = 0
+        for i in range(capacity):
+            steps += 1
+            idx = (h0 + i) % capacity
+            status = elements.status(idx)
+            if status == 0:
+                # Пустая ячейка - ключа нет
+                break
+            if status == 1:
+                slot_key = elements.key(idx)
+                if slot_key == key:
+                    # Найден ключ
+                    return idx, steps
+                # Robin Hood: ключ ближе к своему дому, чем мы сейчас к нашему, - значит,
+                # наш ключ стоял бы раньше, дальше искать незачем
+                if self.robin_hood and elements.dist(idx) < i:
+                    break
+        return -1, steps
+
+    def _locate(self, key: int, h0: int) -> int:
+        # То же, что _find, но без счётчика шагов и без кортежа: индекс ячейки или -1.
+        # Длина пробы берётся из индекса цикла и остаётся в self._probes для метрик
+        elements = self._elements
+        capacity = self.capacity
+        robin_hood = self.robin_hood
+        for i in range(capacity):
+            idx = (h0 + i) % capacity
+            status = elements.status(idx)
+            if status == 0:
+                self._probes = i + 1
+                return -1
+            if status == 1:
+                slot_key = elements.key(idx)
+                if slot_key == key:
+                    self._probes = i + 1
+                    return idx
+                if robin_hood and elements.dist(idx) < i:
+                    self._probes = i + 1
+                    return -1
+        self._probes = capacity
+        return -1
+
+    def _find_old(self, key: int) -> tuple:
+        # Поиск ключа в старой таблице во время переноса: (индекс или -1, шаги)
+        # Перенесённые ячейки стали могилами, поэтому идём до пустой ячейки без ранней остановки
+        old = self._old_elements
+        h0 = self._hash(key, self._old_capacity)
+        steps = 0
+        for i in range(self._old_capacity):
+            steps += 1
+            idx = (h0 + i) % self._old_capacity
+            status = old.status(idx)
+            if status == 0:
+                break
+            if status == 1 and old.key(idx) == key:
+                return idx, steps
+        return -1, steps
+
+    # --- Очистка могил ---
+    def purge_tombstones(self) -> None:
+        """Очищает могилы текущей таблицы на месте, без выделения новой таблицы.
+
+        Обход начинается сразу за пустой ячейкой: могилы становятся пустыми, а каждый
+        живой ключ заново кладётся в первую свободную ячейку от своего "дома" - она
+        всегда не дальше его текущей позиции, поэтому цепочки не рвутся.
+        """
+        if self.tombstones == 0:
+            return
+        elements = self._elements
+        capacity = self.capacity
+        start = -1
+        for idx in range(capacity):
+            if elements.status(idx) == 0:
+                start = idx
+                break
+        if start == -1:
+            # Пустых ячеек нет: собираем живые ключи и раскладываем заново
+            live = [(elements.key(idx), elements.value(idx))
+                    for idx in range(capacity) if elements.status(idx) == 1]
+            for idx in range(capacity):
+                elements.clear(idx)
+            self.tombstones = 0
+            for key, value in live:
+                self._place(key, value)
+            self.purges += 1
+            return
+        for offset in range(1, capacity + 1):
+            idx = (start + offset) % capacity
+            status = elements.status(idx)
+            if status == 2:
+                elements.clear(idx)
+            elif status == 1:
+                key, value = elements.key(idx), elements.value(idx)
+                elements.clear(idx)
+                self._place(key, value)
+        self.tombstones = 0
+        self.purges += 1
+
+    def _maybe_purge(self) -> None:
+        if (self.tombstone_threshold is not None
+                and self.tombstones > self.tombstone_threshold * self.capacity):
+            self.purge_tombstones()
+
     # Убираем set_size и _resize
     # def set_size(self, capacity: int):
     # def _resize(self, new_capacity: int) -> None:
@@ -78,52 +751,74 @@ class HashTable:
     def insert(self, key: int, value: int) -> int:
         self._assert_int(key)
         self._assert_int(value)
-        item = Item(key, value)
 
-        # Убираем проверку порога и рехеширование
-        # if self.size / self.capacity > self.threshold:
-        #     self._resize(self.capacity * 2)
+        if self.migrating:
+            self._migrate(self.migrate_step)
+        return self._insert(key, value, self.hash(key))
 
-        h0 = self.hash(key)
-        first_tombstone: Optional[int] = None
-        for i in range(self.capacity):
-            idx = self.probe(h0, i)
-            slot: Item = self._elements[idx]
-            if slot.status == 1:
-                if slot.key == key:
-                    # Ключ уже существует
-                    return -1
-            elif slot.status == 2 and first_tombstone is None:
-                # Запоминаем первую "могилу"
-                first_tombstone = idx
-            elif slot.status == 0:
-                # Найдена пустая ячейка
-                # Вставляем в первую могилу, если была, иначе в текущую
-                insert_idx = first_tombstone if first_tombstone is not None else idx
-                item.status = 1
-                self._elements[insert_idx] = item
-                self.size += 1
-                return insert_idx
-        # Если таблица заполнена и не нашли место (все ячейки заняты или удалены)
-        # Это маловероятно при 1000 ячейках, но на всякий случай
-        raise Exception("Hash table is full")
+    def _insert(self, key: int, value: int, h0: int) -> int:
+        # Вставка с готовым хешем h0 для текущей capacity
+        if self.migrating and self._find_old(key)[0] != -1:
+            # Ключ ещё не доехал из старой таблицы
+            return -1
+
+        elements = self._elements
+        if self.robin_hood:
+            if self._locate(key, h0) != -1:
+                # Ключ уже существует
+                return -1
+            if self.size >= self.capacity:
+                raise Exception("Hash table is full")
+            insert_idx = self._robin_hood_place(key, value, h0)
+        else:
+            first_tombstone: Optional[int] = None
+            for i in range(self.capacity):
+                idx = self.probe(h0, i)
+                status = elements.status(idx)
+                if status == 1:
+                    if elements.key(idx) == key:
+                        # Ключ уже существует
+                        return -1
+                elif status == 2 and first_tombstone is None:
+                    # Запоминаем первую "могилу"
+                    first_tombstone = idx
+                elif status == 0:
+                    # Найдена пустая ячейка
+                    # Вставляем в первую могилу, если была, иначе в текущую
+                    insert_idx = first_tombstone if first_tombstone is not None else idx
+                    break
+            else:
+                # Пустых ячеек нет, но могила могла найтись
+                if first_tombstone is None:
+                    # Таблица заполнена (все ячейки заняты или удалены)
+                    raise Exception("Hash table is full")
+                insert_idx = first_tombstone
+
+            if elements.status(insert_idx) == 2:
+                self.tombstones -= 1
+            elements.store(insert_idx, key, value)
+        self._record_insert(insert_idx, h0)
+        self.size += 1
+
+        # Растущая таблица удваивается при превышении порога заполненности;
+        # сам перенос идёт порциями в следующих операциях
+        if self.resizable and self.load_factor > self.max_load_factor:
+            self._start_resize(self.capacity * 2)
+        return insert_idx
 
     def search(self, key: int) -> ctypes.Array:
         self._assert_int(key)
-        h0 = self.hash(key)
-        steps: int = 0
-        found: Optional[Item] = None
-        for i in range(self.capacity):
-            steps += 1
-            idx = self.probe(h0, i)
-            slot: Item = self._elements[idx]
-            if slot.status == 0:
-                # Пустая ячейка - ключа нет
-                break
-            if slot.status == 1 and slot.key == key:
-                # Найден ключ
-                found = slot
-                break
+        if self.migrating:
+            self._migrate(self.migrate_step)
+        idx, steps = self._find(key, self.hash(key))
+        found: Optional[Item] = self._elements[idx] if idx != -1 else None
+        if found is None and self.migrating:
+            # Ключ может ещё лежать в старой таблице
+            old_idx, old_steps = self._find_old(key)
+            steps += old_steps
+            if old_idx != -1:
+                found = self._old_elements[old_idx]
+        self._record_lookup(found is not None, steps)
         # Возвращаем массив с найденным Item и количеством шагов
         ResultType = ctypes.py_object * 2
         result: ctypes.Array = ResultType()
@@ -133,23 +828,141 @@ class HashTable:
 
     def delete(self, key: int) -> bool:
         self._assert_int(key)
-        h0 = self.hash(key)
-        for i in range(self.capacity):
-            idx = self.probe(h0, i)
-            slot: Item = self._elements[idx]
-            if slot.status == 0:
-                # Пустая ячейка - ключа нет
-                return False
-            if slot.status == 1 and slot.key == key:
+        if self.migrating:
+            self._migrate(self.migrate_step)
+        idx = self._locate(key, self.hash(key))
+        if idx != -1:
+            if self.robin_hood:
+                self._backward_shift(idx)
+            else:
                 # Найден ключ - помечаем как удалённый
-                slot.status = 2
+                self._elements.set_status(idx, 2)
+                self.tombstones += 1
+                self._maybe_purge()
+            self.size -= 1
+            return True
+        if self.migrating:
+            old_idx, _ = self._find_old(key)
+            if old_idx != -1:
+                self._old_elements.set_status(old_idx, 2)
                 self.size -= 1
                 return True
         # Ключ не найден
         return False
 
+    def _backward_shift(self, idx: int) -> None:
+        # Удаление Robin Hood без могил: сдвигаем следующие ключи на шаг назад,
+        # пока не встретим пустую ячейку или ключ, стоящий в своём "доме"
+        elements = self._elements
+        capacity = self.capacity
+        nxt = (idx + 1) % capacity
+        while elements.status(nxt) == 1:
+            next_dist = elements.dist(nxt)
+            if next_dist == 0:
+                break
+            elements.store(idx, elements.key(nxt), elements.value(nxt), next_dist - 1)
+            idx = nxt
+            nxt = (nxt + 1) % capacity
+        elements.clear(idx)
+
+    def get(self, key: int, default: Optional[int] = None) -> Optional[int]:
+        """Значение (индекс записи) по ключу или default.
+
+        Быстрый путь: без подсчёта шагов и без ctypes-массива результата, как у search.
+        """
+        self._assert_int(key)
+        if self.migrating:
+            self._migrate(self.migrate_step)
+        idx = self._locate(key, self.hash(key))
+        if idx != -1:
+            self._record_lookup(True, self._probes)
+            return self._elements.value(idx)
+        probes = self._probes
+        if self.migrating:
+            old_idx, old_steps = self._find_old(key)
+            probes += old_steps
+            if old_idx != -1:
+                self._record_lookup(True, probes)
+                return self._old_elements.value(old_idx)
+        self._record_lookup(False, probes)
+        return default
+
     def __contains__(self, key: int) -> bool:
-        return self.search(key)[0] is not None
+        return self.get(key) is not None
+
+    # --- Пакетные операции ---
+    # Хеши всех ключей считаются одним проходом (векторно, если есть NumPy),
+    # без ctypes-массива результата на каждый ключ.
+    def _as_keys(self, keys) -> List[int]:
+        # Принимает последовательность, array.array или массив NumPy целых ключей
+        keys = keys.tolist() if hasattr(keys, "tolist") else list(keys)
+        for key in keys:
+            self._assert_int(key)
+            if key < 0:
+                raise ValueError("Key must be non-negative for hashing.")
+        return keys
+
+    def _lookup_many(self, keys: List[int]) -> array:
+        # Индексы (value) найденных ключей, -1 для отсутствующих
+        if self.migrating:
+            self._migrate(self.migrate_step * len(keys))
+        hashes = self.hash_strategy.hash_many(keys, self.capacity)
+        elements = self._elements
+        result = array('q', bytes(8 * len(keys)))
+        for i, key in enumerate(keys):
+            idx = self._locate(key, hashes[i])
+            probes = self._probes
+            if idx != -1:
+                result[i] = elements.value(idx)
+            elif self.migrating:
+                old_idx, old_steps = self._find_old(key)
+                probes += old_steps
+                result[i] = self._old_elements.value(old_idx) if old_idx != -1 else -1
+            else:
+                result[i] = -1
+            self._record_lookup(result[i] != -1, probes)
+        return result
+
+    def search_many(self, keys) -> array:
+        """Ищет ключи пакетом; возвращает array('q') значений (индексов записей), -1 - ключа нет."""
+        return self._lookup_many(self._as_keys(keys))
+
+    def contains_many(self, keys) -> bytearray:
+        """Для каждого ключа 1, если он есть в таблице, иначе 0."""
+        return bytearray(value != -1 for value in self._lookup_many(self._as_keys(keys)))
+
+    def insert_many(self, keys, values=None) -> array:
+        """Вставляет ключи пакетом (values по умолчанию - 0, 1, 2, ...).
+
+        Возвращает array('q') индексов ячеек, как у insert: -1 для уже существующих ключей.
+        """
+        keys = self._as_keys(keys)
+        if values is None:
+            values = range(len(keys))
+        else:
+            values = values.tolist() if hasattr(values, "tolist") else list(values)
+            if len(values) != len(keys):
+                raise ValueError("keys and values must have the same length")
+            for value in values:
+                self._assert_int(value)
+
+        result = array('q', bytes(8 * len(keys)))
+        start = 0
+        while start < len(keys):
+            # Хеши действительны, пока таблица не выросла; после роста пересчитываем остаток
+            capacity = self.capacity
+            hashes = self.hash_strategy.hash_many(keys[start:], capacity)
+            for offset, h0 in enumerate(hashes):
+                i = start + offset
+                if self.migrating:
+                    self._migrate(self.migrate_step)
+                result[i] = self._insert(keys[i], values[i], h0)
+                if self.capacity != capacity:
+                    start = i + 1
+                    break
+            else:
+                start = len(keys)
+        return result
 
     def __repr__(self) -> str:
         slots_str = ""
@@ -161,7 +974,15 @@ class HashTable:
             secondary_hash = i if slot.key is not None else None
             slots_str += (f"\n[hash1:{primary_hash}, hash2:{secondary_hash}, "
                           f"key={slot.key}, value={slot.value}, status={slot.status}]")
-        return (f"HashTable(capacity={self.capacity}, size={self.size}, slots="
+        migration_str = ""
+        if self.migrating:
+            migration_str = (f", migrating={self._migrate_pos}/{self._old_capacity}")
+            for i in range(self._migrate_pos, self._old_capacity):
+                slot = self._old_elements[i]
+                if slot.status == 1:
+                    slots_str += (f"\n[old:{i}, key={slot.key}, value={slot.value}, "
+                                  f"status={slot.status}]")
+        return (f"HashTable(capacity={self.capacity}, size={self.size}{migration_str}, slots="
                 f"{slots_str}\n)")
 
 # --- Пример использования ---
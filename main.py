@@ -1,10 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
-from database import RelationalDatabase
+from database import RelationalDatabase, REPORT_SORT_KEYS
 from DateNew import DateNew
+from parser import format_fields, parse_fields
 
 
-db = RelationalDatabase()
+# GUI показывает количество шагов поиска - включаем инструментирование
+db = RelationalDatabase(instrumented=True)
 
 
 class App(tk.Tk):
@@ -153,10 +155,12 @@ class App(tk.Tk):
         path = filedialog.askopenfilename(title="Файл с пациентами", filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if path:
             try:
-                db.load_patients(path)
+                summary = db.load_patients(path)
                 self.clear_search()
                 self.refresh_tables()
-                messagebox.showinfo("Успех", f"Пациенты загружены из {path}\nЗагружено: {db.first_empty_patient} записей")
+                messagebox.showinfo("Успех", f"Пациенты загружены из {path}\nЗагружено: {db.first_empty_patient} записей\n"
+                                            f"Принято строк: {summary.accepted}, отклонено: {summary.rejected}\n"
+                                            f"Скорость: {summary.rows_per_sec:.0f} строк/с")
             except Exception as e:
                 messagebox.showerror("Ошибка загрузки пациентов", str(e))
 
@@ -164,10 +168,12 @@ class App(tk.Tk):
         path = filedialog.askopenfilename(title="Файл с приёмами", filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if path:
             try:
-                db.load_appointments(path)
+                summary = db.load_appointments(path)
                 self.clear_search()
                 self.refresh_tables()
-                messagebox.showinfo("Успех", f"Приёмы загружены из {path}\nЗагружено: {db.first_empty_appointment} записей")
+                messagebox.showinfo("Успех", f"Приёмы загружены из {path}\nЗагружено: {db.first_empty_appointment} записей\n"
+                                            f"Принято строк: {summary.accepted}, отклонено: {summary.rejected}\n"
+                                            f"Скорость: {summary.rows_per_sec:.0f} строк/с")
             except Exception as e:
                 messagebox.showerror("Ошибка загрузки приёмов", str(e))
 
@@ -179,7 +185,7 @@ class App(tk.Tk):
                     for i in range(db.first_empty_patient):
                         patient = db.patient_arr[i]
                         if patient:
-                            f.write(f"{patient.oms_policy};{patient.full_name};{patient.birth_date}\n")
+                            f.write(format_fields((patient.oms_policy, patient.full_name, patient.birth_date)) + "\n")
                 messagebox.showinfo("Успех", f"Пациенты сохранены в {path}\nСохранено: {db.first_empty_patient} записей")
             except Exception as e:
                 messagebox.showerror("Ошибка", str(e))
@@ -192,7 +198,8 @@ class App(tk.Tk):
                     for i in range(db.first_empty_appointment):
                         appointment = db.appointment_arr[i]
                         if appointment:
-                            f.write(f"{appointment.oms_policy};{appointment.diagnosis};{appointment.doctor};{appointment.appointment_date}\n")
+                            f.write(format_fields((appointment.oms_policy, appointment.diagnosis, appointment.doctor,
+                                                  appointment.appointment_date)) + "\n")
                 messagebox.showinfo("Успех", f"Приёмы сохранены в {path}\nСохранено: {db.first_empty_appointment} записей")
             except Exception as e:
                 messagebox.showerror("Ошибка", str(e))
@@ -369,10 +376,10 @@ class App(tk.Tk):
         self.patient_name_filter = self.patient_name_filter_entry.get().strip()
         if self.patient_name_filter:
             self.found_patients = db.filter_patients_by_name(self.patient_name_filter)
-            steps = db.first_empty_patient
+            _, steps = db.patient_name_index.find_steps(self.patient_name_filter)
             messagebox.showinfo("Результат поиска", 
                 f"Найдено пациентов: {len(self.found_patients)}\n"
-                f"Шагов поиска (перебор массива): до {steps}")
+                f"Шагов поиска в хеш-индексе ФИО: {steps}")
         else:
             self.found_patients = None
         self.refresh_tables()
@@ -388,10 +395,10 @@ class App(tk.Tk):
         self.appointment_doctor_filter = self.appointment_doctor_filter_entry.get().strip()
         if self.appointment_doctor_filter:
             self.found_appointments = db.filter_appointments_by_doctor(self.appointment_doctor_filter)
-            steps = db.first_empty_appointment
+            _, steps = db.appointment_doctor_tree.find_steps(self.appointment_doctor_filter)
             messagebox.showinfo("Результат поиска", 
                 f"Найдено приёмов: {len(self.found_appointments)}\n"
-                f"Шагов поиска (перебор массива): до {steps}")
+                f"Шагов поиска в AVL-дереве врачей: {steps}")
         else:
             self.found_appointments = None
         self.refresh_tables()
@@ -447,18 +454,31 @@ class App(tk.Tk):
         row3 = tk.Frame(filter_frame)
         row3.pack(fill=tk.X, pady=3)
         tk.Label(row3, text="Дата приёма (Справ.2, Поле 4):", width=28, anchor="w").pack(side=tk.LEFT)
-        filter_date_entry = tk.Entry(row3, width=30)
+        filter_date_entry = tk.Entry(row3, width=14)
         filter_date_entry.pack(side=tk.LEFT, padx=5)
-        tk.Label(row3, text="(формат: ДД МММ ГГГГ, например: 20 ноя 2024)", font=("Arial", 8), fg="gray").pack(side=tk.LEFT, padx=5)
+        tk.Label(row3, text="по").pack(side=tk.LEFT)
+        filter_date_to_entry = tk.Entry(row3, width=14)
+        filter_date_to_entry.pack(side=tk.LEFT, padx=5)
+        tk.Label(row3, text="(формат: ДД МММ ГГГГ, например: 20 ноя 2024; \"по\" пусто - только одна дата)",
+                 font=("Arial", 8), fg="gray").pack(side=tk.LEFT, padx=5)
+
+        # Порядок строк отчёта (пусто - порядок массива приёмов)
+        row4 = tk.Frame(filter_frame)
+        row4.pack(fill=tk.X, pady=3)
+        tk.Label(row4, text="Сортировка:", width=28, anchor="w").pack(side=tk.LEFT)
+        sort_box = ttk.Combobox(row4, values=("",) + tuple(REPORT_SORT_KEYS), state="readonly", width=12)
+        sort_box.pack(side=tk.LEFT, padx=5)
 
         # Кнопки управления фильтрами
         button_row = tk.Frame(filter_frame)
         button_row.pack(fill=tk.X, pady=5)
         tk.Button(button_row, text="Применить фильтры", command=lambda: self.apply_report_filters(
-            win, filter_name_entry, filter_doctor_entry, filter_date_entry, report_table, stats_label
+            win, filter_name_entry, filter_doctor_entry, filter_date_entry, filter_date_to_entry,
+            report_table, stats_label, sort_box
         ), bg="#4CAF50", fg="white", font=("Arial", 9, "bold")).pack(side=tk.LEFT, padx=5)
         tk.Button(button_row, text="Сбросить фильтры", command=lambda: self.reset_report_filters(
-            win, filter_name_entry, filter_doctor_entry, filter_date_entry, report_table, stats_label
+            win, filter_name_entry, filter_doctor_entry, filter_date_entry, filter_date_to_entry,
+            report_table, stats_label, sort_box
         )).pack(side=tk.LEFT, padx=5)
 
         # Таблица отчёта
@@ -483,42 +503,54 @@ class App(tk.Tk):
         # Изначально показываем все данные без фильтров
         self.load_report_data(report_table, stats_label, "", "", None)
 
-    def apply_report_filters(self, win, name_entry, doctor_entry, date_entry, report_table, stats_label):
+    def apply_report_filters(self, win, name_entry, doctor_entry, date_entry, date_to_entry, report_table, stats_label,
+                             sort_box=None):
         """Применяет фильтры к отчёту"""
         filter_name = name_entry.get().strip()
         filter_doctor = doctor_entry.get().strip()
         date_text = date_entry.get().strip()
+        date_to_text = date_to_entry.get().strip()
         
         filter_date = None
-        if date_text:
-            try:
+        filter_date_to = None
+        try:
+            if date_text:
                 filter_date = DateNew(date_text)
-            except (ValueError, TypeError) as e:
-                messagebox.showerror("Ошибка", f"Некорректный формат даты: {e}\nИспользуйте: ДД МММ ГГГГ (например: 20 ноя 2024)")
-                return
+            if date_to_text:
+                filter_date_to = DateNew(date_to_text)
+        except (ValueError, TypeError) as e:
+            messagebox.showerror("Ошибка", f"Некорректный формат даты: {e}\nИспользуйте: ДД МММ ГГГГ (например: 20 ноя 2024)")
+            return
 
-        self.load_report_data(report_table, stats_label, filter_name, filter_doctor, filter_date)
+        sort_by = sort_box.get() if sort_box is not None else ""
+        self.load_report_data(report_table, stats_label, filter_name, filter_doctor, filter_date, filter_date_to,
+                              sort_by or None)
 
-    def reset_report_filters(self, win, name_entry, doctor_entry, date_entry, report_table, stats_label):
+    def reset_report_filters(self, win, name_entry, doctor_entry, date_entry, date_to_entry, report_table, stats_label,
+                             sort_box=None):
         """Сбрасывает фильтры отчёта"""
         name_entry.delete(0, tk.END)
         doctor_entry.delete(0, tk.END)
         date_entry.delete(0, tk.END)
+        date_to_entry.delete(0, tk.END)
+        if sort_box is not None:
+            sort_box.set("")
         self.load_report_data(report_table, stats_label, "", "", None)
 
-    def load_report_data(self, report_table, stats_label, filter_name, filter_doctor, filter_date):
+    def load_report_data(self, report_table, stats_label, filter_name, filter_doctor, filter_date, filter_date_to=None,
+                         sort_by=None):
         """Загружает данные в отчёт с учётом фильтров"""
         # Очищаем таблицу
         for row in report_table.get_children():
             report_table.delete(row)
 
         # Генерируем отчёт с фильтрами
-        report_lines = db.generate_report(filter_name, filter_doctor, filter_date)
+        report_lines = db.generate_report(filter_name, filter_doctor, filter_date, filter_date_to, sort_by)
         
         # Подсчёт шагов поиска
         total_steps = 0
         for line in report_lines:
-            parts = line.split(';')
+            parts = parse_fields(line)
             if len(parts) >= 6:
                 oms = int(parts[0])
                 _, steps = db.find_patient_steps(oms)
@@ -533,7 +565,9 @@ class App(tk.Tk):
             filter_info.append(f"ФИО='{filter_name}'")
         if filter_doctor:
             filter_info.append(f"Врач='{filter_doctor}'")
-        if filter_date:
+        if filter_date_to:
+            filter_info.append(f"Даты={filter_date or '...'} - {filter_date_to}")
+        elif filter_date:
             filter_info.append(f"Дата={filter_date}")
         
         filter_text = f" (фильтры: {', '.join(filter_info)})" if filter_info else ""
@@ -545,7 +579,7 @@ class App(tk.Tk):
         rows = []
         for item in report_table.get_children():
             values = report_table.item(item)["values"]
-            rows.append(';'.join(str(v) for v in values))
+            rows.append(format_fields(values))
 
         if not rows:
             messagebox.showinfo("Информация", "Отчёт пуст, нечего сохранять")
@@ -1,69 +1,349 @@
 # massive.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
+#
+# Загрузка файлов - потоковый конвейер по пакетам строк:
+#   чтение пакета -> разбор полей -> проверка и создание объектов -> пакетная индексация.
+# В памяти одновременно только один пакет строк; проверки по хеш-таблицам идут пакетом
+# (contains_many/insert_many), а не отдельным поиском на каждую строку.
+#
+# Параллельный режим (workers > 1): файл режется на диапазоны байт по границам строк,
+# разбор и создание объектов идут в ProcessPoolExecutor, а индексация - в основном
+# процессе в порядке файла, поэтому результат и предупреждения те же, что у обычной загрузки.
+
+import io
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator
 
 from Patient import Patient
 from Appointment import Appointment
 from DateNew import DateNew
 from hash_table import HashTable
 from avl_tree import AVLTree
-from List import MyList
-from parser import parse
+from hash_index import HashIndex
+from paged_array import PagedArray
+from parser import parse_fields, ParseError
 
-def patients_to_array(filename: str, patient_ht: HashTable, patient_arr, first_empty_index: int) -> int:
-    """
-    Загружает пациентов из файла в массив patient_arr и заполняет patient_ht.
-    Возвращает обновлённый индекс first_empty_patient.
-    """
-    current_index = first_empty_index
-    with open(filename, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, start=1):
+# Построчная диагностика загрузки - через logging (уровень DEBUG), а не print:
+# вывод на каждую строку занимал почти всё время загрузки большого файла
+logger = logging.getLogger(__name__)
+
+# Строк в пакете конвейера
+DEFAULT_BATCH_SIZE = 4096
+# Сколько разных строк дат держать разобранными (даты в файлах часто повторяются)
+DATE_CACHE_SIZE = 1 << 16
+# Размер диапазона файла на одну задачу параллельной загрузки
+PARALLEL_CHUNK_BYTES = 1 << 22
+
+
+class LoadSummary:
+    """Итог загрузки файла: принятые и отклонённые строки, время и скорость."""
+    __slots__ = ("filename", "accepted", "rejected", "seconds")
+
+    def __init__(self, filename: str = "") -> None:
+        self.filename: str = filename
+        self.accepted: int = 0
+        self.rejected: int = 0
+        self.seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return (self.accepted + self.rejected) / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.filename}: accepted {self.accepted}, rejected {self.rejected}, "
+                f"{self.seconds:.2f} s ({self.rows_per_sec:.0f} rows/s)")
+
+
+# --- Чтение ---
+def read_batches(f, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[list]:
+    """Стадия чтения: пакеты непустых строк [(номер строки, строка без пробелов по краям)]."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    line_num = 0
+    while True:
+        lines = list(islice(f, batch_size))
+        if not lines:
+            return
+        batch = []
+        for line in lines:
+            line_num += 1
             line = line.strip()
-            if not line:
-                print(f"[DEBUG massive] Skipping empty line {line_num}")
-                continue
+            if line:
+                batch.append((line_num, line))
+            else:
+                logger.debug("Skipping empty line %d", line_num)
+        yield batch
 
-            print(f"[DEBUG massive] Processing line {line_num}: '{line}'")
-            parts_list = parse(line, sep=';')
-            print(f"[DEBUG massive] parts_list from parser: {parts_list}")
-            if len(parts_list) != 3:
-                print(f"Warning: Skipping invalid patient line {line_num}: '{line}'. Expected 3 parts, got {len(parts_list)}.")
-                continue
 
+def split_ranges(filename: str, chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> Iterator[tuple]:
+    """Диапазоны байт [start, end) файла примерно по chunk_bytes; каждый кончается концом строки."""
+    if chunk_bytes <= 0:
+        raise ValueError("chunk_bytes must be positive")
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        start = 0
+        while start < size:
+            # Дочитываем строку, на которую попал разрез; разрез посреди символа UTF-8
+            # не страшен - ищется только b"\n"
+            f.seek(start + chunk_bytes)
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+
+# --- Разбор и создание объектов ---
+def _split_line(line: str, field_count: int) -> tuple:
+    # (поля, None) или (None, причина отказа)
+    try:
+        fields = parse_fields(line, sep=';')
+    except ParseError as e:
+        return None, f"Error: {e}"
+    if len(fields) != field_count:
+        return None, f"Expected {field_count} parts, got {len(fields)}."
+    return fields, None
+
+
+def parse_date(date_str: str, cache: dict) -> DateNew:
+    # DateNew не меняется после создания, поэтому одинаковые строки дат делят один объект
+    date = cache.get(date_str)
+    if date is None:
+        date = DateNew(date_str)
+        if len(cache) >= DATE_CACHE_SIZE:
+            cache.clear()
+        cache[date_str] = date
+    return date
+
+
+def build_patients(batch: list, dates: dict) -> list:
+    """Стадия создания: [(номер строки, строка, Patient или None, причина отказа)]."""
+    entries = []
+    for line_num, line in batch:
+        fields, detail = _split_line(line, 3)
+        patient = None
+        if fields is not None:
+            oms_str, full_name, birth_date_str = fields
             try:
-                # ИСПРАВЛЕНИЕ: parts_list добавляет в начало, поэтому порядок обратный
-                # Было: [0]=oms, [1]=name, [2]=date
-                # Стало: [0]=date, [1]=name, [2]=oms (из-за append в начало)
-                # Поэтому берём с конца:
-                oms_str = parts_list[2]        # Последний элемент = первый добавленный
-                full_name = parts_list[1]      # Средний остаётся средним
-                birth_date_str = parts_list[0] # Первый элемент = последний добавленный
+                patient = Patient(oms_policy=int(oms_str), full_name=full_name,
+                                  birth_date=parse_date(birth_date_str, dates))
+            except (ValueError, TypeError) as e:
+                detail = f"Error: {e}"
+        entries.append((line_num, line, patient, detail))
+    return entries
 
-                print(f"[DEBUG massive] oms_str: '{oms_str}', full_name: '{full_name}', birth_date_str: '{birth_date_str}'")
 
+def build_appointments(batch: list, dates: dict) -> list:
+    """
+    Стадия создания: [(номер строки, строка, полис, Appointment, составной ключ, причина отказа)].
+    Полис None - строку не удалось разобрать; Appointment None при известном полисе -
+    приём невалиден, но сначала (как и раньше) проверяется, есть ли пациент.
+    """
+    entries = []
+    for line_num, line in batch:
+        fields, detail = _split_line(line, 4)
+        oms_policy = appointment = key = None
+        if fields is not None:
+            # Формат файла: oms;diagnosis;doctor;date
+            oms_str, diagnosis, doctor, appointment_date_str = fields
+            try:
                 oms_policy = int(oms_str)
-                print(f"[DEBUG massive] oms_policy: {oms_policy}")
-                birth_date = DateNew(birth_date_str)
-                print(f"[DEBUG massive] birth_date: {birth_date}")
+                appointment_date = parse_date(appointment_date_str, dates)
+            except (ValueError, TypeError) as e:
+                oms_policy = None
+                detail = f"Error: {e}"
+            else:
+                try:
+                    appointment = Appointment(oms_policy=oms_policy, diagnosis=diagnosis, doctor=doctor,
+                                              appointment_date=appointment_date)
+                    key = appointment.key()
+                except (ValueError, TypeError) as e:
+                    appointment = None
+                    detail = f"Error: {e}"
+        entries.append((line_num, line, oms_policy, appointment, key, detail))
+    return entries
 
-                patient = Patient(oms_policy=oms_policy, full_name=full_name, birth_date=birth_date)
-                print(f"[DEBUG massive] Created Patient: {patient}")
 
-                if current_index >= len(patient_arr):
-                     print(f"Error: Patient array is full. Cannot load more patients from {filename}.")
-                     break
+# Вид записей файла -> стадия создания
+_BUILDERS = {
+    "patient": build_patients,
+    "appointment": build_appointments,
+}
 
-                inserted_idx = patient_ht.insert(patient.oms_policy, current_index)
-                if inserted_idx == -1:
-                    print(f"Warning: Duplicate OMS Policy {oms_policy} found in file {filename}, skipping patient '{full_name}'.")
-                    continue
 
-                patient_arr[current_index] = patient
-                print(f"[DEBUG massive] Patient inserted at index {current_index}")
-                current_index += 1
+def _build_range(filename: str, start: int, end: int, kind: str, batch_size: int) -> tuple:
+    # Задача процесса-исполнителя: (записи диапазона, число строк в нём).
+    # Номера строк - от начала диапазона, сдвиг добавляет основной процесс
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # newline=None - те же границы строк, что при чтении файла в текстовом режиме
+    lines = io.StringIO(data.decode('utf-8'), newline=None).readlines()
+    build = _BUILDERS[kind]
+    dates = {}
+    entries = []
+    for batch in read_batches(iter(lines), batch_size):
+        entries.extend(build(batch, dates))
+    return entries, len(lines)
 
-            except (ValueError, TypeError) as e:
-                print(f"Warning: Skipping invalid patient line {line_num}: '{line}'. Error: {e}")
+
+def _entry_batches(filename: str, kind: str, batch_size: int, workers: int) -> Iterator[tuple]:
+    """(записи стадии создания, сдвиг номеров строк) в порядке файла."""
+    if kind not in _BUILDERS:
+        valid = ", ".join(_BUILDERS)
+        raise ValueError(f"Unknown record kind {kind!r}. Valid: {valid}")
+    build = _BUILDERS[kind]
+    if workers <= 1:
+        dates = {}
+        with open(filename, 'r', encoding='utf-8') as f:
+            for batch in read_batches(f, batch_size):
+                yield build(batch, dates), 0
+        return
+
+    # В работе не больше 2 * workers диапазонов - память ограничена и на огромных файлах
+    line_offset = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        try:
+            for start, end in split_ranges(filename):
+                pending.append(pool.submit(_build_range, filename, start, end, kind, batch_size))
+                if len(pending) >= 2 * workers:
+                    entries, line_count = pending.popleft().result()
+                    yield entries, line_offset
+                    line_offset += line_count
+            while pending:
+                entries, line_count = pending.popleft().result()
+                yield entries, line_offset
+                line_offset += line_count
+        finally:
+            # Загрузка прервана (массив заполнен, ошибка) - не начатые задачи не нужны
+            for future in pending:
+                future.cancel()
+
+
+# --- Индексация (основной процесс, порядок файла) ---
+def _index_patients(entries: list, line_offset: int, filename: str, patient_ht: HashTable, patient_arr: PagedArray,
+                    current_index: int, patient_name_index: HashIndex[str],
+                    summary: LoadSummary) -> tuple:
+    # Повторы полисов - одним contains_many по ХТ и множеством по самому пакету.
+    # Возвращает (новый current_index, заполнен ли массив)
+    present = iter(patient_ht.contains_many(
+        [patient.oms_policy for _, _, patient, _ in entries if patient is not None]))
+    batch_start = current_index
+    keys = []
+    seen = set()
+    full = False
+    for line_num, line, patient, detail in entries:
+        if patient is None:
+            print(f"Warning: Skipping invalid patient line {line_num + line_offset}: '{line}'. {detail}")
+            summary.rejected += 1
+            continue
+        if patient_arr.full(current_index):
+            print(f"Error: Patient array is full. Cannot load more patients from {filename}.")
+            full = True
+            break
+        if next(present) or patient.oms_policy in seen:
+            print(f"Warning: Duplicate OMS Policy {patient.oms_policy} found in file {filename}, skipping patient '{patient.full_name}'.")
+            summary.rejected += 1
+            continue
+        seen.add(patient.oms_policy)
+        keys.append(patient.oms_policy)
+        patient_arr[current_index] = patient
+        if patient_name_index is not None:
+            patient_name_index.insert(patient.full_name, current_index)
+        current_index += 1
+    patient_ht.insert_many(keys, range(batch_start, current_index))
+    summary.accepted += current_index - batch_start
+    logger.debug("Patients %d..%d indexed", batch_start, current_index - 1)
+    return current_index, full
+
+
+def _index_appointments(entries: list, line_offset: int, filename: str, patient_ht: HashTable,
+                        appointment_arr: PagedArray, current_index: int, trees: tuple, pairs: tuple,
+                        appointment_key_ht: HashTable, summary: LoadSummary) -> tuple:
+    # trees - (по OMS, по дате, по врачу или None); pairs - списки пар для bulk_load или None.
+    # Возвращает (новый current_index, заполнен ли массив)
+    known = iter(patient_ht.contains_many([entry[2] for entry in entries if entry[2] is not None]))
+    if appointment_key_ht is not None:
+        present = iter(appointment_key_ht.contains_many([entry[4] for entry in entries if entry[4] is not None]))
+    batch_start = current_index
+    keys = []
+    seen = set()
+    full = False
+    for line_num, line, oms_policy, appointment, key, detail in entries:
+        if oms_policy is None:
+            print(f"Warning: Skipping invalid appointment line {line_num + line_offset}: '{line}'. {detail}")
+            summary.rejected += 1
+            continue
+        exists = next(known)
+        # Ответ contains_many по составному ключу нужен, только если приём создан
+        duplicate = next(present) if key is not None and appointment_key_ht is not None else False
+        if not exists:
+            print(f"Warning: Appointment for OMS Policy {oms_policy} found in {filename}, but patient does not exist. Skipping appointment.")
+            summary.rejected += 1
+            continue
+        if appointment is None:
+            print(f"Warning: Skipping invalid appointment line {line_num + line_offset}: '{line}'. {detail}")
+            summary.rejected += 1
+            continue
+        if appointment_arr.full(current_index):
+            print(f"Error: Appointment array is full. Cannot load more appointments from {filename}.")
+            full = True
+            break
+        if appointment_key_ht is not None:
+            if duplicate or key in seen:
+                print(f"Warning: Skipping duplicate appointment on line {line_num + line_offset}: '{line}'.")
+                summary.rejected += 1
                 continue
+            seen.add(key)
+            keys.append(key)
+
+        if pairs is not None:
+            pairs[0].append((appointment.oms_policy, current_index))
+            pairs[1].append((appointment.appointment_date, current_index))
+            pairs[2].append((appointment.doctor, current_index))
+        else:
+            trees[0].insert(appointment.oms_policy, current_index)
+            trees[1].insert(appointment.appointment_date, current_index)
+            if trees[2] is not None:
+                trees[2].insert(appointment.doctor, current_index)
 
+        appointment_arr[current_index] = appointment
+        current_index += 1
+    if appointment_key_ht is not None:
+        appointment_key_ht.insert_many(keys, range(batch_start, current_index))
+    summary.accepted += current_index - batch_start
+    logger.debug("Appointments %d..%d indexed", batch_start, current_index - 1)
+    return current_index, full
+
+
+def patients_to_array(filename: str, patient_ht: HashTable, patient_arr: PagedArray, first_empty_index: int,
+                      patient_name_index: HashIndex[str] = None,
+                      batch_size: int = DEFAULT_BATCH_SIZE, summary: LoadSummary = None,
+                      workers: int = 1) -> int:
+    """
+    Загружает пациентов из файла в массив patient_arr и заполняет patient_ht
+    (и индекс по ФИО patient_name_index, если он передан).
+    Файл читается пакетами по batch_size строк; итог (принято/отклонено, скорость)
+    записывается в summary, если он передан. workers > 1 - разбор и проверка строк
+    в стольких процессах, результат тот же.
+    Возвращает обновлённый индекс first_empty_patient.
+    """
+    if summary is None:
+        summary = LoadSummary(filename)
+    started = time.perf_counter()
+    current_index = first_empty_index
+    for entries, line_offset in _entry_batches(filename, "patient", batch_size, workers):
+        current_index, full = _index_patients(entries, line_offset, filename, patient_ht, patient_arr,
+                                              current_index, patient_name_index, summary)
+        if full:
+            break
+
+    summary.seconds = time.perf_counter() - started
+    logger.info("%s", summary)
     return current_index
 
 
@@ -71,66 +351,45 @@ def appointments_to_array(
     filename: str,
     appointment_tree: AVLTree[int],
     patient_ht: HashTable,
-    appointment_arr,
+    appointment_arr: PagedArray,
     first_empty_index: int,
-    appointment_date_tree: AVLTree[DateNew]
+    appointment_date_tree: AVLTree[DateNew],
+    appointment_doctor_tree: AVLTree[str] = None,
+    appointment_key_ht: HashTable = None,
+    bulk_build: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    summary: LoadSummary = None,
+    workers: int = 1
 ) -> int:
     """
-    Загружает приёмы из файла в массив appointment_arr и заполняет деревья.
+    Загружает приёмы из файла в массив appointment_arr и заполняет деревья
+    (и индекс по врачу appointment_doctor_tree, если он передан).
+    Если передана ХТ составных ключей appointment_key_ht, повторы уже загруженных
+    приёмов пропускаются, а новые заносятся в неё.
+    bulk_build=True (только для пустых деревьев): пары (ключ, индекс) копятся и деревья
+    строятся одним AVLTree.bulk_load в конце, без балансировки на каждой строке.
+    Файл читается пакетами по batch_size строк; итог (принято/отклонено, скорость)
+    записывается в summary, если он передан. workers > 1 - разбор и проверка строк
+    в стольких процессах, результат тот же.
     Возвращает обновлённый индекс first_empty_appointment.
     """
+    if summary is None:
+        summary = LoadSummary(filename)
+    started = time.perf_counter()
     current_index = first_empty_index
-    with open(filename, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                print(f"[DEBUG massive] Appointment: Skipping empty line {line_num}")
-                continue
-
-            print(f"[DEBUG massive] Appointment: Processing line {line_num}: '{line}'")
-            parts_list = parse(line, sep=';')
-            print(f"[DEBUG massive] Appointment: parts_list from parser: {parts_list}")
-            if len(parts_list) != 4:
-                print(f"Warning: Skipping invalid appointment line {line_num}: '{line}'. Expected 4 parts, got {len(parts_list)}.")
-                continue
+    trees = (appointment_tree, appointment_date_tree, appointment_doctor_tree)
+    pairs = ([], [], []) if bulk_build else None
+    for entries, line_offset in _entry_batches(filename, "appointment", batch_size, workers):
+        current_index, full = _index_appointments(entries, line_offset, filename, patient_ht, appointment_arr,
+                                                  current_index, trees, pairs, appointment_key_ht, summary)
+        if full:
+            break
 
-            try:
-                # ИСПРАВЛЕНИЕ: обратный порядок из-за append в начало
-                # Формат файла: oms;diagnosis;doctor;date
-                # После parse: [3]=oms, [2]=diagnosis, [1]=doctor, [0]=date
-                oms_str = parts_list[3]
-                diagnosis = parts_list[2]
-                doctor = parts_list[1]
-                appointment_date_str = parts_list[0]
-
-                print(f"[DEBUG massive] Appointment: oms_str: '{oms_str}', diagnosis: '{diagnosis}', doctor: '{doctor}', appointment_date_str: '{appointment_date_str}'")
-
-                oms_policy = int(oms_str)
-                print(f"[DEBUG massive] Appointment: oms_policy: {oms_policy}")
-                appointment_date = DateNew(appointment_date_str)
-                print(f"[DEBUG massive] Appointment: appointment_date: {appointment_date}")
-
-                patient_search_result = patient_ht.search(oms_policy)
-                if patient_search_result[0] is None:
-                    print(f"Warning: Appointment for OMS Policy {oms_policy} found in {filename}, but patient does not exist. Skipping appointment.")
-                    continue
-
-                appointment = Appointment(oms_policy=oms_policy, diagnosis=diagnosis, doctor=doctor, appointment_date=appointment_date)
-                print(f"[DEBUG massive] Appointment: Created Appointment: {appointment}")
-
-                if current_index >= len(appointment_arr):
-                     print(f"Error: Appointment array is full. Cannot load more appointments from {filename}.")
-                     break
-
-                appointment_tree.insert(appointment.oms_policy, current_index)
-                appointment_date_tree.insert(appointment.appointment_date, current_index)
-
-                appointment_arr[current_index] = appointment
-                print(f"[DEBUG massive] Appointment: Appointment inserted at index {current_index}")
-                current_index += 1
-
-            except (ValueError, TypeError) as e:
-                print(f"Warning: Skipping invalid appointment line {line_num}: '{line}'. Error: {e}")
-                continue
-
-    return current_index
\ No newline at end of file
+    if pairs is not None:
+        appointment_tree.bulk_load(pairs[0])
+        appointment_date_tree.bulk_load(pairs[1])
+        if appointment_doctor_tree is not None:
+            appointment_doctor_tree.bulk_load(pairs[2])
+    summary.seconds = time.perf_counter() - started
+    logger.info("%s", summary)
+    return current_index
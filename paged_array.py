@@ -0,0 +1,165 @@
+# paged_array.py - Растущий массив записей БД и страничный словарь с копированием при записи
+
+import ctypes
+import itertools
+from typing import Iterator, Optional
+
+# Поколения владельцев страниц: copy() выдаёт обеим сторонам новые, и страница,
+# помеченная чужим поколением, перед записью копируется (как узлы AVLTree.snapshot)
+_epochs = itertools.count(1)
+
+
+class PagedArray:
+    """Массив объектов из страниц ctypes.py_object по PAGE_SIZE ячеек.
+
+    Растёт добавлением страниц: уже заполненные ячейки не копируются, поэтому
+    запись в конец - O(1). max_size ограничивает число ячеек (None - без ограничения).
+    Невыставленные ячейки читаются как None. len - число выделенных ячеек.
+    copy() делит страницы с копией за O(число страниц); первая запись в общую
+    страницу с любой стороны копирует только эту страницу.
+    """
+    # Ячеек на странице (степень двойки: номер страницы - сдвигом, позиция - маской)
+    PAGE_BITS: int = 10
+    PAGE_SIZE: int = 1 << PAGE_BITS
+    __slots__ = ("max_size", "_pages", "_owners", "_epoch")
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        if max_size is not None and max_size < 0:
+            raise ValueError("max_size must be non-negative or None")
+        self.max_size: Optional[int] = max_size
+        self._pages: list = []
+        # Поколение, которому принадлежит каждая страница; менять на месте можно только свои
+        self._owners: list = []
+        self._epoch: int = next(_epochs)
+
+    def __len__(self) -> int:
+        return len(self._pages) << self.PAGE_BITS
+
+    def full(self, index: int) -> bool:
+        """True, если ячейку index занять нельзя: она за пределом max_size."""
+        return self.max_size is not None and index >= self.max_size
+
+    def _new_page(self) -> ctypes.Array:
+        page = (ctypes.py_object * self.PAGE_SIZE)()
+        page[:] = [None] * self.PAGE_SIZE
+        return page
+
+    def __getitem__(self, index: int):
+        if index < 0 or index >= len(self):
+            raise IndexError("PagedArray index out of range")
+        return self._pages[index >> self.PAGE_BITS][index & (self.PAGE_SIZE - 1)]
+
+    def __setitem__(self, index: int, value) -> None:
+        if index < 0 or self.full(index):
+            raise IndexError("PagedArray index out of range")
+        page_no = index >> self.PAGE_BITS
+        while page_no >= len(self._pages):
+            self._pages.append(self._new_page())
+            self._owners.append(self._epoch)
+        if self._owners[page_no] != self._epoch:
+            # Страница общая с копией: меняем свою копию страницы
+            page = (ctypes.py_object * self.PAGE_SIZE)()
+            page[:] = self._pages[page_no][:]
+            self._pages[page_no] = page
+            self._owners[page_no] = self._epoch
+        self._pages[page_no][index & (self.PAGE_SIZE - 1)] = value
+
+    def copy(self) -> "PagedArray":
+        """Независимая копия за O(число страниц): страницы общие до первой записи в них."""
+        clone = PagedArray(self.max_size)
+        clone._pages = list(self._pages)
+        clone._owners = list(self._owners)
+        # Общие страницы больше не принадлежат и оригиналу
+        self._epoch = next(_epochs)
+        return clone
+
+    def __repr__(self) -> str:
+        return f"PagedArray(pages={len(self._pages)}, max_size={self.max_size})"
+
+
+class PagedDict:
+    """Словарь из страниц-словарей: ключ лежит на странице hash(key) & (число страниц - 1).
+
+    copy() делит страницы с копией за O(число страниц); первая запись в общую
+    страницу с любой стороны копирует только её (до PAGE_SIZE ключей в среднем).
+    Когда ключей становится больше PAGE_SIZE на страницу, число страниц удваивается -
+    ключи перераскладываются один раз, амортизированно O(1) на вставку.
+    Порядок обхода не совпадает с порядком вставки.
+    """
+    # Средняя заполненность страницы, после которой число страниц удваивается
+    PAGE_SIZE: int = 1024
+    __slots__ = ("_pages", "_owners", "_epoch", "_size")
+
+    def __init__(self) -> None:
+        self._pages: list = [{}]
+        self._epoch: int = next(_epochs)
+        self._owners: list = [self._epoch]
+        self._size: int = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _page(self, key) -> dict:
+        return self._pages[hash(key) & (len(self._pages) - 1)]
+
+    def _own_page(self, key) -> dict:
+        # Страница ключа, которую можно менять на месте
+        page_no = hash(key) & (len(self._pages) - 1)
+        if self._owners[page_no] != self._epoch:
+            self._pages[page_no] = self._pages[page_no].copy()
+            self._owners[page_no] = self._epoch
+        return self._pages[page_no]
+
+    def __contains__(self, key) -> bool:
+        return key in self._page(key)
+
+    def __getitem__(self, key):
+        return self._page(key)[key]
+
+    def get(self, key, default=None):
+        return self._page(key).get(key, default)
+
+    def __setitem__(self, key, value) -> None:
+        page = self._own_page(key)
+        if key not in page:
+            self._size += 1
+        page[key] = value
+        if self._size > len(self._pages) * self.PAGE_SIZE:
+            self._split()
+
+    def __delitem__(self, key) -> None:
+        del self._own_page(key)[key]
+        self._size -= 1
+
+    def _split(self) -> None:
+        # Удваивает число страниц: страница i делится на i и i + n по следующему биту хеша
+        n = len(self._pages)
+        pages = [None] * (2 * n)
+        for page_no, page in enumerate(self._pages):
+            low, high = {}, {}
+            for key, value in page.items():
+                (high if hash(key) & n else low)[key] = value
+            pages[page_no], pages[page_no + n] = low, high
+        self._pages = pages
+        self._owners = [self._epoch] * (2 * n)
+
+    def __iter__(self) -> Iterator:
+        for page in self._pages:
+            yield from page
+
+    def items(self) -> Iterator[tuple]:
+        for page in self._pages:
+            yield from page.items()
+
+    def copy(self) -> "PagedDict":
+        """Независимая копия за O(число страниц): страницы общие до первой записи в них."""
+        clone = PagedDict.__new__(PagedDict)
+        clone._pages = list(self._pages)
+        clone._owners = list(self._owners)
+        clone._epoch = next(_epochs)
+        clone._size = self._size
+        self._epoch = next(_epochs)
+        return clone
+
+    def __repr__(self) -> str:
+        return f"PagedDict(size={self._size}, pages={len(self._pages)})"
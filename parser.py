@@ -1,14 +1,24 @@
 # parser.py
 
+import logging
+from typing import Optional
+
 # Импортируем MyList из нашего основного файла List.py
 from List import MyList
 
-def parse(string: str, sep: str = ' ') -> MyList[str]:
-    """
-    Разбивает строку на компоненты по разделителю и возвращает MyList[str].
-    """
-    print(f"[DEBUG] parser.parse: входная строка: '{string}', разделитель: '{sep}'") # Лог 1
+# Отладочный вывод - через logging (включается, например, logging.basicConfig(level=logging.DEBUG))
+logger = logging.getLogger(__name__)
+
+
+class ParseError(ValueError):
+    """Ошибка разбора строки; column - позиция (с 1), где найдена ошибка."""
 
+    def __init__(self, message: str, column: int) -> None:
+        super().__init__(f"{message} (column {column})")
+        self.column: int = column
+
+
+def _check_args(string: str, sep: str) -> None:
     if not isinstance(string, str):
         raise TypeError(f"Expected str, got {type(string).__name__}")
     if not isinstance(sep, str):
@@ -16,43 +26,109 @@ def parse(string: str, sep: str = ' ') -> MyList[str]:
     if sep == "":
         raise ValueError("Separator must not be empty")
 
+
+def parse(string: str, sep: str = ' ') -> MyList[str]:
+    """
+    Разбивает строку на компоненты по разделителю и возвращает MyList[str].
+    MyList.append добавляет в начало, поэтому компоненты идут в обратном порядке;
+    для загрузки файлов - parse_fields (порядок файла, кавычки).
+    """
+    _check_args(string, sep)
     components: MyList[str] = MyList[str]()
-    start_i: int = 0
-    sep_len: int = len(sep)
+    components.extend(string.split(sep))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("parse(%r, sep=%r) -> %s", string, sep, components)
+    return components
+
+
+def parse_fields(string: str, sep: str = ';', quote: str = '"', expected: Optional[int] = None) -> tuple:
+    """
+    Быстрый разбор строки файла: кортеж полей в порядке файла.
+
+    Поле, начинающееся с кавычки, читается до парной кавычки и может содержать sep;
+    удвоенная кавычка внутри поля означает саму кавычку (как в CSV).
+    Строки без кавычек разбираются одним str.split. Ошибки (незакрытая кавычка,
+    текст после закрывающей, число полей не равно expected) - ParseError с позицией.
+    """
+    _check_args(string, sep)
+    if quote in string:
+        fields = _split_quoted(string, sep, quote)
+    else:
+        fields = tuple(string.split(sep))
+    if expected is not None and len(fields) != expected:
+        raise ParseError(f"Expected {expected} fields, got {len(fields)}", len(string) + 1)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("parse_fields(%r) -> %r", string, fields)
+    return fields
+
+
+def _split_quoted(string: str, sep: str, quote: str) -> tuple:
+    fields = []
+    sep_len = len(sep)
+    length = len(string)
+    pos = 0
     while True:
-        index: int = string.find(sep, start_i)
-        print(f"[DEBUG] parser.parse: ищем '{sep}' начиная с {start_i}, найден индекс {index}") # Лог 2
-        if index == -1:
-            remaining_part = string[start_i:]
-            print(f"[DEBUG] parser.parse: достигнут конец строки, добавляем остаток: '{remaining_part}'") # Лог 3
-            components.append(remaining_part)
-            break
-        part = string[start_i:index]
-        print(f"[DEBUG] parser.parse: найдена часть: '{part}'") # Лог 4
-        components.append(part)
-        start_i = index + sep_len
-
-    print(f"[DEBUG] parser.parse: результат MyList: {components}") # Лог 5
-    print(f"[DEBUG] parser.parse: длина результата: {len(components)}") # Лог 6
-    for i in range(len(components)):
-        print(f"[DEBUG] parser.parse: components[{i}] = '{components[i]}'") # Лог 7
+        if string.startswith(quote, pos):
+            # Поле в кавычках: ищем закрывающую, пропуская удвоенные
+            opened = pos
+            pos += 1
+            parts = []
+            while True:
+                close = string.find(quote, pos)
+                if close == -1:
+                    raise ParseError("Unterminated quoted field", opened + 1)
+                parts.append(string[pos:close])
+                pos = close + 1
+                if string.startswith(quote, pos):
+                    parts.append(quote)
+                    pos += 1
+                else:
+                    break
+            fields.append("".join(parts))
+            if pos == length:
+                return tuple(fields)
+            if not string.startswith(sep, pos):
+                raise ParseError("Expected separator after closing quote", pos + 1)
+            pos += sep_len
+        else:
+            index = string.find(sep, pos)
+            if index == -1:
+                fields.append(string[pos:])
+                return tuple(fields)
+            fields.append(string[pos:index])
+            pos = index + sep_len
+
+
+def format_fields(fields, sep: str = ';', quote: str = '"') -> str:
+    """Обратное к parse_fields: поля через sep, поле с sep или с кавычкой в начале - в кавычках."""
+    out = []
+    for field in fields:
+        field = str(field)
+        if sep in field or field.startswith(quote):
+            field = quote + field.replace(quote, quote + quote) + quote
+        out.append(field)
+    return sep.join(out)
 
-    return components
 
 # --- Тестирование ---
 if __name__ == "__main__":
     # Примеры использования
     result1 = parse("oms_policy;full_name;birth_date", sep=';')
-    print(f"Parse 1: {result1}") # -> MyList(['oms_policy', 'full_name', 'birth_date'])
+    print(f"Parse 1: {result1}") # -> [birth_date, full_name, oms_policy]
     print(f"Type of result1: {type(result1)}") # -> <class 'List.MyList'> (или как у вас будет импортировано)
 
     print("\n--- Следующий тест ---\n")
 
-    result2 = parse("12345;Иванов Иван Иванович;01 Jan 1980", sep=';')
-    print(f"Parse 2: {result2}") # -> MyList(['12345', 'Иванов Иван Иванович', '01 Jan 1980'])
+    result2 = parse_fields("12345;\"Иванов; Иван\";01 Jan 1980", expected=3)
+    print(f"Parse 2: {result2}") # -> ('12345', 'Иванов; Иван', '01 Jan 1980')
     print(f"Length: {len(result2)}") # -> 3
     print(f"First part: {result2[0]}") # -> 12345
 
+    try:
+        parse_fields("12345;\"Иванов;01 Jan 1980")
+    except ParseError as e:
+        print(f"Error: {e}, column: {e.column}") # -> Unterminated quoted field (column 7)
+
     # result3 = parse("test", sep="") # -> ValueError
     # result4 = parse(123, sep=";") # -> TypeError
     # result5 = parse("a,b,c", sep=1) # -> TypeError
@@ -3,6 +3,8 @@
 import tkinter as tk
 from tkinter import ttk
 
+from avl_tree import AVLTree
+
 class VisualizationWindow(tk.Toplevel):
     def __init__(self, parent, db):
         super().__init__(parent)
@@ -36,7 +38,7 @@ class VisualizationWindow(tk.Toplevel):
         
         tk.Label(info_frame, text="Хеш-таблица пациентов", font=("Arial", 14, "bold"), bg="#e8f4f8").pack(pady=5)
         
-        stats_text = f"Размер: {capacity} | Занято: {size} | Загруженность: {load_factor:.1%} | Метод: середина квадрата | Пробирование: линейное"
+        stats_text = f"Размер: {capacity} | Занято: {size} | Загруженность: {load_factor:.1%} | Метод: {ht.hash_strategy.title} | Пробирование: линейное"
         tk.Label(info_frame, text=stats_text, font=("Arial", 10), bg="#e8f4f8").pack()
         
         # Canvas для визуализации
@@ -165,7 +167,7 @@ class VisualizationWindow(tk.Toplevel):
         
         tree = self.db.appointment_tree
         node_count = len(tree)
-        height = self.get_tree_height(tree.root)
+        height = tree.height
         
         tk.Label(info_frame, text="AVL-дерево приёмов (ключ: OMS Policy)", font=("Arial", 14, "bold"), bg="#e8f4f8").pack(pady=5)
         
@@ -186,10 +188,7 @@ class VisualizationWindow(tk.Toplevel):
         canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # Рисуем дерево
-        if tree.root:
-            self.draw_avl_tree(canvas, tree.root, canvas_width=1300)
-        else:
-            canvas.create_text(400, 200, text="Дерево пусто", font=("Arial", 16), fill="gray")
+        self.draw_index(canvas, tree)
         
         canvas.configure(scrollregion=canvas.bbox("all"))
     
@@ -205,7 +204,7 @@ class VisualizationWindow(tk.Toplevel):
         
         tree = self.db.appointment_date_tree
         node_count = len(tree)
-        height = self.get_tree_height(tree.root)
+        height = tree.height
         
         tk.Label(info_frame, text="AVL-дерево приёмов (ключ: Дата приёма)", font=("Arial", 14, "bold"), bg="#e8f4f8").pack(pady=5)
         
@@ -226,13 +225,21 @@ class VisualizationWindow(tk.Toplevel):
         canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # Рисуем дерево
-        if tree.root:
-            self.draw_avl_tree(canvas, tree.root, canvas_width=1300)
-        else:
-            canvas.create_text(400, 200, text="Дерево пусто", font=("Arial", 16), fill="gray")
+        self.draw_index(canvas, tree)
         
         canvas.configure(scrollregion=canvas.bbox("all"))
     
+    def draw_index(self, canvas, tree):
+        """Рисует AVL-дерево; для B+-дерева (index_type="bplus") - только сводку"""
+        if len(tree) == 0:
+            canvas.create_text(400, 200, text="Дерево пусто", font=("Arial", 16), fill="gray")
+        elif isinstance(tree, AVLTree):
+            self.draw_avl_tree(canvas, tree.root, canvas_width=1300)
+        else:
+            canvas.create_text(400, 200, text=f"B+-дерево (порядок {tree.order}): {len(tree)} ключей, "
+                                              f"{tree.height} уровней.\nСодержимое листьев - в окне отладки.",
+                               font=("Arial", 14), fill="gray")
+
     def get_tree_height(self, node):
         """Вычисляет высоту дерева"""
         if node is None: